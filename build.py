@@ -5,12 +5,153 @@ Supporta Windows, macOS e Linux.
 
 import os
 import sys
+import argparse
 import shutil
 import subprocess
 import platform
+import hashlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 
+# Template dei file di supporto generati dalla build
+VERSION_INFO_TEMPLATE = """# UTF-8
+#
+# For more details about fixed file info 'ffi' see:
+# http://msdn.microsoft.com/en-us/library/ms646997.aspx
+VSVersionInfo(
+  ffi=FixedFileInfo(
+    filevers=(1,0,0,0),
+    prodvers=(1,0,0,0),
+    mask=0x3f,
+    flags=0x0,
+    OS=0x40004,
+    fileType=0x1,
+    subtype=0x0,
+    date=(0, 0)
+    ),
+  kids=[
+    StringFileInfo(
+      [
+      StringTable(
+        u'040904B0',
+        [StringStruct(u'CompanyName', u'File Organizer'),
+        StringStruct(u'FileDescription', u'Organizzatore File Aziendali'),
+        StringStruct(u'FileVersion', u'1.0.0.0'),
+        StringStruct(u'InternalName', u'FileOrganizer'),
+        StringStruct(u'LegalCopyright', u'Copyright (C) 2024'),
+        StringStruct(u'OriginalFilename', u'FileOrganizer.exe'),
+        StringStruct(u'ProductName', u'File Organizer'),
+        StringStruct(u'ProductVersion', u'1.0.0.0')])
+      ]), 
+    VarFileInfo([VarStruct(u'Translation', [1033, 1200])])
+  ]
+)"""
+
+ICON_SVG_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<svg width="64" height="64" viewBox="0 0 64 64" xmlns="http://www.w3.org/2000/svg">
+  <rect width="64" height="64" rx="8" fill="#4CAF50"/>
+  <path d="M16 20h32v4H16zm0 8h32v4H16zm0 8h24v4H16zm0 8h28v4H16z" fill="white"/>
+  <circle cx="48" cy="40" r="8" fill="#FF9800"/>
+  <path d="M44 36l4 4 8-8" stroke="white" stroke-width="2" fill="none"/>
+</svg>"""
+
+INSTALL_BAT_TEMPLATE = """@echo off
+echo File Organizer - Installer
+echo.
+
+set "INSTALL_DIR=%PROGRAMFILES%\\FileOrganizer"
+set "DESKTOP_LINK=%USERPROFILE%\\Desktop\\File Organizer.lnk"
+set "STARTMENU_LINK=%APPDATA%\\Microsoft\\Windows\\Start Menu\\Programs\\File Organizer.lnk"
+
+echo Installazione in: %INSTALL_DIR%
+echo.
+
+REM Crea la directory di installazione
+if not exist "%INSTALL_DIR%" mkdir "%INSTALL_DIR%"
+
+REM Copia l'eseguibile
+{copy_command}
+if errorlevel 1 (
+    echo ERRORE: Impossibile copiare l'eseguibile
+    pause
+    exit /b 1
+)
+
+REM Crea collegamenti (richiede PowerShell)
+powershell -Command "$WshShell = New-Object -comObject WScript.Shell; $Shortcut = $WshShell.CreateShortcut('%DESKTOP_LINK%'); $Shortcut.TargetPath = '%INSTALL_DIR%\\FileOrganizer{ext}'; $Shortcut.Save()"
+powershell -Command "$WshShell = New-Object -comObject WScript.Shell; $Shortcut = $WshShell.CreateShortcut('%STARTMENU_LINK%'); $Shortcut.TargetPath = '%INSTALL_DIR%\\FileOrganizer{ext}'; $Shortcut.Save()"
+
+echo.
+echo Installazione completata!
+echo - Eseguibile: %INSTALL_DIR%\\FileOrganizer{ext}
+echo - Collegamento Desktop: %DESKTOP_LINK%
+echo - Collegamento Start Menu: %STARTMENU_LINK%
+echo.
+pause
+"""
+
+# Comandi di copia per build --onefile (True) e --onedir (False)
+INSTALL_BAT_COPY_COMMANDS = {
+    True: 'copy "FileOrganizer{ext}" "%INSTALL_DIR%\\" >nul',
+    False: 'xcopy "FileOrganizer{ext}" "%INSTALL_DIR%\\" /E /I /Y >nul',
+}
+
+INSTALL_SH_TEMPLATE = """#!/bin/bash
+echo "File Organizer - Installer"
+echo
+
+INSTALL_DIR="/usr/local/bin"
+DESKTOP_FILE="$HOME/.local/share/applications/file-organizer.desktop"
+
+echo "Installazione in: $INSTALL_DIR"
+echo
+
+# Copia l'eseguibile (richiede sudo)
+{copy_command}
+if [ $? -ne 0 ]; then
+    echo "ERRORE: Impossibile copiare l'eseguibile (serve sudo)"
+    exit 1
+fi
+
+# Rendi eseguibile
+sudo chmod +x "$INSTALL_DIR/FileOrganizer{ext}"
+
+# Crea file desktop per Linux
+if [ "$OSTYPE" = "linux-gnu"* ]; then
+    mkdir -p "$(dirname "$DESKTOP_FILE")"
+    cat > "$DESKTOP_FILE" << EOF
+[Desktop Entry]
+Name=File Organizer
+Comment=Organizzatore File Aziendali
+Exec=$INSTALL_DIR/FileOrganizer{ext}
+Icon=folder
+Terminal=false
+Type=Application
+Categories=Utility;FileManager;
+EOF
+    echo "File desktop creato: $DESKTOP_FILE"
+fi
+
+echo
+echo "Installazione completata!"
+echo "- Eseguibile: $INSTALL_DIR/FileOrganizer{ext}"
+echo "- Comando: FileOrganizer{ext}"
+echo
+"""
+
+INSTALL_SH_COPY_COMMANDS = {
+    True: 'sudo cp FileOrganizer{ext} "$INSTALL_DIR/"',
+    # La cartella --onedir va in /opt, con un link all'eseguibile in $INSTALL_DIR
+    False: ('sudo mkdir -p /opt/FileOrganizer && '
+            'sudo cp -r FileOrganizer{ext}/. /opt/FileOrganizer/ && '
+            'sudo ln -sf /opt/FileOrganizer/FileOrganizer{ext} "$INSTALL_DIR/FileOrganizer{ext}"'),
+}
+
+
+@lru_cache(maxsize=1)
 def get_platform_info():
     """Restituisce informazioni sulla piattaforma corrente."""
     system = platform.system().lower()
@@ -26,34 +167,143 @@ def get_platform_info():
     return system, arch, ext, separator
 
 
+def _scandir_rmtree(path):
+    """Rimuove ricorsivamente una directory con un'unica scansione per livello."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _scandir_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
+
+def _fast_rmtree(path):
+    """Rimuove una directory con rm -rf / rd /s /q, con fallback in Python."""
+    if get_platform_info()[0] == "windows":
+        cmd = ["cmd", "/c", "rd", "/s", "/q", str(path)]
+    else:
+        cmd = ["rm", "-rf", str(path)]
+    
+    try:
+        subprocess.check_call(cmd, stdout=subprocess.DEVNULL,
+                              close_fds=(os.name != "nt"))
+        if not os.path.exists(path):
+            return
+    except (subprocess.CalledProcessError, OSError):
+        pass
+    
+    try:
+        _scandir_rmtree(path)
+    except OSError:
+        shutil.rmtree(path)
+
+
+def _find_pycache_dirs(root, skip_dirs=()):
+    """
+    Trova tutte le directory __pycache__ sotto root con una visita os.scandir.
+    
+    Args:
+        root: Directory da cui partire
+        skip_dirs: Nomi di directory in cui non scendere
+        
+    Returns:
+        Lista dei percorsi delle directory __pycache__
+    """
+    found = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if entry.name == "__pycache__":
+                        found.append(entry.path)
+                    elif not entry.name.startswith(".") and entry.name not in skip_dirs:
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return found
+
+
 def clean_build_dirs():
     """Pulisce le directory di build precedenti."""
-    dirs_to_clean = ["build", "dist", "__pycache__"]
+    dirs_to_clean = ["build", "dist"]
     
+    # Tutti i __pycache__ del progetto: bytecode non ottimizzato rimasto
+    # da esecuzioni precedenti finirebbe nel bundle al posto di quello -OO
+    pycache_dirs = _find_pycache_dirs(".", skip_dirs=set(dirs_to_clean) | {"venv"})
+    
+    to_remove = []
     for dir_name in dirs_to_clean:
         if os.path.exists(dir_name):
             print(f"Rimozione directory: {dir_name}")
-            shutil.rmtree(dir_name)
+            # Rinomina prima di cancellare: il percorso originale torna
+            # subito libero anche se la rimozione richiede tempo
+            trash_name = f"{dir_name}.old.{os.getpid()}"
+            try:
+                os.rename(dir_name, trash_name)
+                to_remove.append(trash_name)
+            except OSError:
+                to_remove.append(dir_name)
     
-    # Rimuovi anche i file .spec
-    for spec_file in Path(".").glob("*.spec"):
+    for pycache_dir in pycache_dirs:
+        print(f"Rimozione directory: {pycache_dir}")
+        to_remove.append(pycache_dir)
+    
+    spec_files = list(Path(".").glob("*.spec"))
+    for spec_file in spec_files:
         print(f"Rimozione file spec: {spec_file}")
-        spec_file.unlink()
+    
+    # Le directory sono indipendenti: le rimozioni procedono in parallelo
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 4, 4)) as executor:
+        futures = [executor.submit(_fast_rmtree, path) for path in to_remove]
+        futures += [executor.submit(spec_file.unlink) for spec_file in spec_files]
+        for future in futures:
+            future.result()
 
 
-def create_pyinstaller_command():
-    """Crea il comando PyInstaller per la build."""
+# Varianti di build selezionabili con --variants (opzioni PyInstaller aggiuntive)
+BUILD_VARIANTS = {
+    "release": [],
+    "console": ["--console"],
+    "debug": ["--console", "--debug", "imports"],
+}
+
+
+def create_pyinstaller_command(onefile=True, variant=None):
+    """
+    Crea il comando PyInstaller per la build.
+    
+    Args:
+        onefile: Se True crea un singolo eseguibile, altrimenti una cartella
+            (--onedir) che non richiede estrazione ad ogni avvio
+        variant: Nome della variante in BUILD_VARIANTS (None = build standard)
+    """
     system, arch, ext, separator = get_platform_info()
     
-    # Comando base
+    dist_dir, work_dir, spec_dir = "dist", "build", "."
+    if variant:
+        # Ogni variante ha cartelle proprie per poter essere compilata in parallelo
+        dist_dir = os.path.join("dist", variant)
+        work_dir = os.path.join("build", variant)
+        spec_dir = work_dir
+    
+    def source(path):
+        # PyInstaller risolve i percorsi relativi rispetto a --specpath
+        return os.path.abspath(path) if variant else path
+    
+    # Comando base (stesso interprete dello script, senza passare dal launcher)
     cmd = [
-        "pyinstaller",
-        "--onefile",  # Crea un singolo eseguibile
+        sys.executable, "-m", "PyInstaller",
+        "--onefile" if onefile else "--onedir",
         "--windowed" if system == "windows" else "--console",  # GUI su Windows, console su altri
         "--name", f"FileOrganizer{ext}",
-        "--distpath", "dist",
-        "--workpath", "build",
-        "--specpath", ".",
+        "--distpath", dist_dir,
+        "--workpath", work_dir,
+        "--specpath", spec_dir,
     ]
     
     # Aggiungi i dati necessari
@@ -63,7 +313,7 @@ def create_pyinstaller_command():
     
     for src, dst in data_files:
         if os.path.exists(src):
-            cmd.extend(["--add-data", f"{src}{separator}{dst}"])
+            cmd.extend(["--add-data", f"{source(src)}{separator}{dst}"])
     
     # Moduli nascosti che potrebbero essere necessari
     hidden_imports = [
@@ -72,10 +322,6 @@ def create_pyinstaller_command():
         "PyQt6.QtWidgets",
         "rapidfuzz",
         "yaml",
-        "csv",
-        "datetime",
-        "pathlib",
-        "threading",
     ]
     
     for module in hidden_imports:
@@ -90,70 +336,111 @@ def create_pyinstaller_command():
         "pandas",
         "PIL",
         "cv2",
+        # Moduli della libreria standard non usati dall'applicazione
+        "test",
+        "unittest",
+        "distutils",
+        "setuptools",
+        "pydoc",
+        "xmlrpc",
+        "sqlite3",
+        "pdb",
+        "doctest",
+        "lib2to3",
+        # Moduli Qt non usati
+        "PyQt6.QtQml",
+        "PyQt6.QtNetwork",
+        "PyQt6.QtWebEngineCore",
+        "PyQt6.QtMultimedia",
+        "PyQt6.QtBluetooth",
+        "PyQt6.QtWebSockets",
     ]
     
     for module in excludes:
         cmd.extend(["--exclude-module", module])
     
+    # Compressione UPX se disponibile
+    upx_dir = os.environ.get("UPX_DIR")
+    if not upx_dir:
+        upx_path = shutil.which("upx")
+        if upx_path:
+            upx_dir = os.path.dirname(upx_path)
+    if upx_dir:
+        cmd.extend(["--upx-dir", upx_dir])
+    
     # Opzioni specifiche per piattaforma
     if system == "windows":
         if os.path.exists("assets/icon.ico"):
-            cmd.extend(["--icon", "assets/icon.ico"])
+            cmd.extend(["--icon", source("assets/icon.ico")])
         if os.path.exists("version_info.txt"):
-            cmd.extend(["--version-file", "version_info.txt"])
+            cmd.extend(["--version-file", source("version_info.txt")])
     
     elif system == "darwin":  # macOS
         if os.path.exists("assets/icon.icns"):
-            cmd.extend(["--icon", "assets/icon.icns"])
+            cmd.extend(["--icon", source("assets/icon.icns")])
+    
+    if variant:
+        cmd.extend(BUILD_VARIANTS[variant])
     
     # File principale
-    cmd.append("main.py")
+    cmd.append(source("main.py"))
     
     return cmd
 
 
+def _run_streaming(cmd, env=None, prefix=""):
+    """Esegue un comando inoltrando il suo output riga per riga."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1, env=env)
+    with proc.stdout:
+        for line in proc.stdout:
+            sys.stdout.write(prefix + line)
+    returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+def _atomic_write_bytes(path, data):
+    """Scrive un file tramite file temporaneo e os.replace, senza lasciarlo troncato."""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _write_if_changed(path, content):
+    """
+    Scrive un file di testo solo se il contenuto è diverso da quello attuale.
+    
+    Args:
+        path: Percorso del file
+        content: Contenuto da scrivere
+        
+    Returns:
+        True se il file è stato scritto
+    """
+    target = Path(path)
+    data = content.encode("utf-8")
+    if target.exists() and target.read_bytes() == data:
+        return False
+    _atomic_write_bytes(target, data)
+    return True
+
+
 def create_version_info():
     """Crea il file version_info per Windows."""
-    if platform.system().lower() != "windows":
+    if get_platform_info()[0] != "windows":
         return
     
-    version_info = """# UTF-8
-#
-# For more details about fixed file info 'ffi' see:
-# http://msdn.microsoft.com/en-us/library/ms646997.aspx
-VSVersionInfo(
-  ffi=FixedFileInfo(
-    filevers=(1,0,0,0),
-    prodvers=(1,0,0,0),
-    mask=0x3f,
-    flags=0x0,
-    OS=0x40004,
-    fileType=0x1,
-    subtype=0x0,
-    date=(0, 0)
-    ),
-  kids=[
-    StringFileInfo(
-      [
-      StringTable(
-        u'040904B0',
-        [StringStruct(u'CompanyName', u'File Organizer'),
-        StringStruct(u'FileDescription', u'Organizzatore File Aziendali'),
-        StringStruct(u'FileVersion', u'1.0.0.0'),
-        StringStruct(u'InternalName', u'FileOrganizer'),
-        StringStruct(u'LegalCopyright', u'Copyright (C) 2024'),
-        StringStruct(u'OriginalFilename', u'FileOrganizer.exe'),
-        StringStruct(u'ProductName', u'File Organizer'),
-        StringStruct(u'ProductVersion', u'1.0.0.0')])
-      ]), 
-    VarFileInfo([VarStruct(u'Translation', [1033, 1200])])
-  ]
-)"""
-    
-    with open("version_info.txt", "w", encoding="utf-8") as f:
-        f.write(version_info)
-    
-    print("File version_info.txt creato per Windows")
+    if _write_if_changed("version_info.txt", VERSION_INFO_TEMPLATE):
+        print("File version_info.txt creato per Windows")
 
 
 def create_icon_files():
@@ -164,30 +451,85 @@ def create_icon_files():
     # Crea un'icona SVG semplice se non esiste
     icon_svg = assets_dir / "icon.svg"
     if not icon_svg.exists():
-        svg_content = """<?xml version="1.0" encoding="UTF-8"?>
-<svg width="64" height="64" viewBox="0 0 64 64" xmlns="http://www.w3.org/2000/svg">
-  <rect width="64" height="64" rx="8" fill="#4CAF50"/>
-  <path d="M16 20h32v4H16zm0 8h32v4H16zm0 8h24v4H16zm0 8h28v4H16z" fill="white"/>
-  <circle cx="48" cy="40" r="8" fill="#FF9800"/>
-  <path d="M44 36l4 4 8-8" stroke="white" stroke-width="2" fill="none"/>
-</svg>"""
-        
-        with open(icon_svg, "w", encoding="utf-8") as f:
-            f.write(svg_content)
-        
+        _write_if_changed(icon_svg, ICON_SVG_TEMPLATE)
         print(f"Icona SVG creata: {icon_svg}")
 
 
-def run_build():
-    """Esegue la build dell'applicazione."""
+# File con l'impronta degli input delle ultime build testate con successo
+# (una riga "eseguibile impronta"). Sta fuori da dist/ perché
+# clean_build_dirs() la svuota ad ogni build.
+BUILD_CACHE_FILE = Path(".build_cache")
+
+
+def _load_build_cache():
+    """Legge le impronte delle build testate, indicizzate per eseguibile."""
+    if not BUILD_CACHE_FILE.exists():
+        return {}
+    cache = {}
+    for line in BUILD_CACHE_FILE.read_text(encoding="utf-8").splitlines():
+        exe, _, inputs_hash = line.rpartition(" ")
+        if exe:
+            cache[exe] = inputs_hash
+    return cache
+
+
+def _build_inputs_hash(cmd):
+    """Calcola un'impronta del comando e dei sorgenti che entrano nella build."""
+    digest = hashlib.sha256("\0".join(cmd).encode("utf-8"))
+    sources = sorted(Path(".").glob("*.py")) + sorted(Path("assets").glob("*"))
+    for source in sources:
+        try:
+            stat = source.stat()
+        except OSError:
+            continue
+        digest.update(f"{source}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _smoke_test(exe_path):
+    """Esegue `exe --help` e restituisce True se termina con successo."""
+    try:
+        # L'output non serve: DEVNULL evita pipe e thread di lettura
+        test_result = subprocess.run([str(exe_path), "--help"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   close_fds=(os.name != "nt"), timeout=10)
+        if test_result.returncode == 0:
+            print("✓ Test CLI riuscito")
+            return True
+        print("⚠ Test CLI fallito")
+    except subprocess.TimeoutExpired:
+        print("⚠ Test CLI timeout")
+    except Exception as e:
+        print(f"⚠ Errore nel test: {e}")
+    return False
+
+
+def get_executable_path(onefile=True, variant=None):
+    """Restituisce il percorso dell'eseguibile prodotto dalla build."""
+    _, _, ext, _ = get_platform_info()
+    exe_name = f"FileOrganizer{ext}"
+    dist_dir = Path("dist") / variant if variant else Path("dist")
+    if onefile:
+        return dist_dir / exe_name
+    return dist_dir / exe_name / exe_name
+
+
+def run_build(optimize=True, skip_test=False, onefile=True, variants=None):
+    """
+    Esegue la build dell'applicazione.
+    
+    Args:
+        optimize: Se True, compila i moduli inclusi con PYTHONOPTIMIZE=2
+        skip_test: Se True, non esegue il test dell'eseguibile creato
+        onefile: Se True crea un singolo eseguibile, altrimenti una cartella
+        variants: Varianti da compilare in parallelo (None = build standard)
+    """
     print("=== File Organizer - Script di Build ===")
     print(f"Piattaforma: {platform.system()} {platform.machine()}")
     print()
     
     # Verifica che PyInstaller sia installato
-    try:
-        subprocess.run(["pyinstaller", "--version"], check=True, capture_output=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if importlib.util.find_spec("PyInstaller") is None:
         print("ERRORE: PyInstaller non trovato. Installalo con: pip install pyinstaller")
         return 1
     
@@ -202,141 +544,90 @@ def run_build():
     
     # Crea il comando PyInstaller
     print("3. Preparazione comando PyInstaller...")
-    cmd = create_pyinstaller_command()
+    builds = [(variant, create_pyinstaller_command(onefile=onefile, variant=variant))
+              for variant in (variants or [None])]
     
-    print("Comando PyInstaller:")
-    print(" ".join(cmd))
-    print()
+    for variant, cmd in builds:
+        print(f"Comando PyInstaller{f' ({variant})' if variant else ''}:")
+        print(" ".join(cmd))
+        print()
     
-    # Esegui PyInstaller
+    # Con PYTHONOPTIMIZE=2 PyInstaller include bytecode senza assert e docstring
+    env = dict(os.environ)
+    if optimize:
+        env["PYTHONOPTIMIZE"] = "2"
+    
+    # Esegui PyInstaller: ogni variante è un processo separato, i thread
+    # si limitano ad attenderli e a inoltrarne l'output
     print("4. Esecuzione PyInstaller...")
-    try:
-        result = subprocess.run(cmd, check=True)
-        print("Build completata con successo!")
-        
-        # Mostra informazioni sull'eseguibile creato
-        system, arch, ext, _ = get_platform_info()
-        exe_path = Path("dist") / f"FileOrganizer{ext}"
+    failed = False
+    with ThreadPoolExecutor(max_workers=min(len(builds), os.cpu_count() or 1)) as executor:
+        futures = {
+            executor.submit(_run_streaming, cmd, env, f"[{variant}] " if variant else ""): variant
+            for variant, cmd in builds
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except subprocess.CalledProcessError as e:
+                variant = futures[future]
+                print(f"ERRORE nella build{f' ({variant})' if variant else ''}: {e}")
+                failed = True
+    
+    if failed:
+        return 1
+    
+    print("Build completata con successo!")
+    
+    # Mostra informazioni sugli eseguibili creati
+    tested = _load_build_cache()
+    for variant, cmd in builds:
+        exe_path = get_executable_path(onefile, variant)
         
         if exe_path.exists():
             size_mb = exe_path.stat().st_size / (1024 * 1024)
             print(f"\nEseguibile creato: {exe_path}")
             print(f"Dimensione: {size_mb:.1f} MB")
             
-            # Test rapido dell'eseguibile
+            # Test rapido dell'eseguibile, ripetuto solo se gli input sono cambiati
             print("\n5. Test dell'eseguibile...")
-            try:
-                test_result = subprocess.run([str(exe_path), "--help"], 
-                                           capture_output=True, text=True, timeout=10)
-                if test_result.returncode == 0:
-                    print("✓ Test CLI riuscito")
-                else:
-                    print("⚠ Test CLI fallito")
-            except subprocess.TimeoutExpired:
-                print("⚠ Test CLI timeout")
-            except Exception as e:
-                print(f"⚠ Errore nel test: {e}")
-        
-        return 0
-        
-    except subprocess.CalledProcessError as e:
-        print(f"ERRORE nella build: {e}")
-        return 1
+            inputs_hash = _build_inputs_hash(cmd)
+            if skip_test:
+                print("Test saltato (--skip-test)")
+            elif tested.get(str(exe_path)) == inputs_hash:
+                print("Test saltato: sorgenti invariati rispetto all'ultima build testata")
+            elif _smoke_test(exe_path):
+                tested[str(exe_path)] = inputs_hash
+    
+    BUILD_CACHE_FILE.write_text(
+        "".join(f"{exe} {inputs_hash}\n" for exe, inputs_hash in tested.items()),
+        encoding="utf-8"
+    )
+    
+    return 0
 
 
-def create_installer_script():
-    """Crea uno script per l'installazione."""
+def create_installer_script(onefile=True):
+    """
+    Crea uno script per l'installazione.
+    
+    Args:
+        onefile: Se False lo script copia l'intera cartella prodotta da --onedir
+    """
     system, arch, ext, _ = get_platform_info()
     
     if system == "windows":
         # Script batch per Windows
-        script_content = f"""@echo off
-echo File Organizer - Installer
-echo.
-
-set "INSTALL_DIR=%PROGRAMFILES%\\FileOrganizer"
-set "DESKTOP_LINK=%USERPROFILE%\\Desktop\\File Organizer.lnk"
-set "STARTMENU_LINK=%APPDATA%\\Microsoft\\Windows\\Start Menu\\Programs\\File Organizer.lnk"
-
-echo Installazione in: %INSTALL_DIR%
-echo.
-
-REM Crea la directory di installazione
-if not exist "%INSTALL_DIR%" mkdir "%INSTALL_DIR%"
-
-REM Copia l'eseguibile
-copy "FileOrganizer{ext}" "%INSTALL_DIR%\\" >nul
-if errorlevel 1 (
-    echo ERRORE: Impossibile copiare l'eseguibile
-    pause
-    exit /b 1
-)
-
-REM Crea collegamenti (richiede PowerShell)
-powershell -Command "$WshShell = New-Object -comObject WScript.Shell; $Shortcut = $WshShell.CreateShortcut('%DESKTOP_LINK%'); $Shortcut.TargetPath = '%INSTALL_DIR%\\FileOrganizer{ext}'; $Shortcut.Save()"
-powershell -Command "$WshShell = New-Object -comObject WScript.Shell; $Shortcut = $WshShell.CreateShortcut('%STARTMENU_LINK%'); $Shortcut.TargetPath = '%INSTALL_DIR%\\FileOrganizer{ext}'; $Shortcut.Save()"
-
-echo.
-echo Installazione completata!
-echo - Eseguibile: %INSTALL_DIR%\\FileOrganizer{ext}
-echo - Collegamento Desktop: %DESKTOP_LINK%
-echo - Collegamento Start Menu: %STARTMENU_LINK%
-echo.
-pause
-"""
-        
-        with open("dist/install.bat", "w", encoding="utf-8") as f:
-            f.write(script_content)
-        
+        copy_command = INSTALL_BAT_COPY_COMMANDS[onefile].format(ext=ext)
+        _write_if_changed("dist/install.bat",
+                          INSTALL_BAT_TEMPLATE.format(ext=ext, copy_command=copy_command))
         print("Script di installazione Windows creato: dist/install.bat")
     
     else:
         # Script shell per Unix/Linux/macOS
-        script_content = f"""#!/bin/bash
-echo "File Organizer - Installer"
-echo
-
-INSTALL_DIR="/usr/local/bin"
-DESKTOP_FILE="$HOME/.local/share/applications/file-organizer.desktop"
-
-echo "Installazione in: $INSTALL_DIR"
-echo
-
-# Copia l'eseguibile (richiede sudo)
-sudo cp FileOrganizer{ext} "$INSTALL_DIR/"
-if [ $? -ne 0 ]; then
-    echo "ERRORE: Impossibile copiare l'eseguibile (serve sudo)"
-    exit 1
-fi
-
-# Rendi eseguibile
-sudo chmod +x "$INSTALL_DIR/FileOrganizer{ext}"
-
-# Crea file desktop per Linux
-if [ "$OSTYPE" = "linux-gnu"* ]; then
-    mkdir -p "$(dirname "$DESKTOP_FILE")"
-    cat > "$DESKTOP_FILE" << EOF
-[Desktop Entry]
-Name=File Organizer
-Comment=Organizzatore File Aziendali
-Exec=$INSTALL_DIR/FileOrganizer{ext}
-Icon=folder
-Terminal=false
-Type=Application
-Categories=Utility;FileManager;
-EOF
-    echo "File desktop creato: $DESKTOP_FILE"
-fi
-
-echo
-echo "Installazione completata!"
-echo "- Eseguibile: $INSTALL_DIR/FileOrganizer{ext}"
-echo "- Comando: FileOrganizer{ext}"
-echo
-"""
-        
-        with open("dist/install.sh", "w", encoding="utf-8") as f:
-            f.write(script_content)
+        copy_command = INSTALL_SH_COPY_COMMANDS[onefile].format(ext=ext)
+        _write_if_changed("dist/install.sh",
+                          INSTALL_SH_TEMPLATE.format(ext=ext, copy_command=copy_command))
         
         # Rendi eseguibile
         os.chmod("dist/install.sh", 0o755)
@@ -344,32 +635,59 @@ echo
         print("Script di installazione Unix creato: dist/install.sh")
 
 
+def create_parser():
+    """Crea il parser degli argomenti dello script di build."""
+    parser = argparse.ArgumentParser(description="Build di File Organizer con PyInstaller")
+    parser.add_argument('action', nargs='?', default='build',
+                        choices=['build', 'clean', 'installer'],
+                        help='Operazione da eseguire (default: build)')
+    parser.add_argument('--no-optimize', action='store_true',
+                        help='Non impostare PYTHONOPTIMIZE=2 durante la build')
+    parser.add_argument('--onedir', action='store_true',
+                        help='Crea una cartella invece di un singolo eseguibile '
+                             '(avvio più rapido, nessuna estrazione temporanea)')
+    parser.add_argument('--skip-test', action='store_true',
+                        help='Non eseguire il test dell\'eseguibile dopo la build')
+    parser.add_argument('--variants', nargs='+', choices=sorted(BUILD_VARIANTS),
+                        help='Compila in parallelo le varianti indicate in dist/<variante>/')
+    return parser
+
+
 def main():
     """Funzione principale dello script di build."""
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "clean":
-            print("Pulizia directory di build...")
-            clean_build_dirs()
-            return 0
-        elif sys.argv[1] == "installer":
-            print("Creazione script di installazione...")
-            create_installer_script()
-            return 0
+    args = create_parser().parse_args()
+    
+    if args.action == "clean":
+        print("Pulizia directory di build...")
+        clean_build_dirs()
+        return 0
+    elif args.action == "installer":
+        print("Creazione script di installazione...")
+        create_installer_script(onefile=not args.onedir)
+        return 0
     
     # Esegui la build
-    result = run_build()
+    result = run_build(optimize=not args.no_optimize, skip_test=args.skip_test,
+                       onefile=not args.onedir, variants=args.variants)
     
     if result == 0:
-        # Crea anche lo script di installazione
-        create_installer_script()
+        # Crea anche lo script di installazione (solo per la build standard)
+        if not args.variants:
+            create_installer_script(onefile=not args.onedir)
         
         print("\n=== Build Completata ===")
         print("File creati nella directory 'dist/':")
         
-        for file_path in Path("dist").glob("*"):
-            if file_path.is_file():
-                size_mb = file_path.stat().st_size / (1024 * 1024)
-                print(f"  - {file_path.name} ({size_mb:.1f} MB)")
+        with os.scandir("dist") as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    size_mb = entry.stat().st_size / (1024 * 1024)
+                    print(f"  - {entry.name} ({size_mb:.1f} MB)")
+                elif entry.is_dir(follow_symlinks=False):
+                    print(f"  - {entry.name}/")
+        
+        if args.variants:
+            return result
         
         print("\nPer installare l'applicazione:")
         system, _, _, _ = get_platform_info()
@@ -3,17 +3,19 @@ Interfaccia a riga di comando per il File Organizer.
 Fornisce accesso completo alle funzionalità tramite CLI.
 """
 
-import argparse
+import re
 import sys
 import os
+import time
 from datetime import datetime, date
 from pathlib import Path
-from typing import List, Set
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Set
 
-from core import FileOrganizerCore
-from io_ops import FileOperationLogger, UndoManager
-from config import get_config_manager
-from normalize import generate_company_aliases
+# I moduli applicativi sono importati nei singoli comandi per velocizzare l'avvio
+
+# Separatore delle liste di estensioni (virgola con eventuali spazi)
+_EXTENSION_SEPARATOR = re.compile(r'\s*,\s*')
 
 
 def parse_date(date_string: str) -> date:
@@ -48,15 +50,11 @@ def parse_extensions(extensions_string: str) -> Set[str]:
     if not extensions_string:
         return set()
     
-    extensions = set()
-    for ext in extensions_string.split(','):
-        ext = ext.strip()
-        if ext:
-            if not ext.startswith('.'):
-                ext = '.' + ext
-            extensions.add(ext.lower())
-    
-    return extensions
+    return {
+        (ext if ext.startswith('.') else '.' + ext).lower()
+        for ext in _EXTENSION_SEPARATOR.split(extensions_string.strip())
+        if ext
+    }
 
 
 def print_progress(phase: str, current: int, total: int):
@@ -75,8 +73,38 @@ def print_progress(phase: str, current: int, total: int):
         print(f"\r{phase} {current}", end='', flush=True)
 
 
+def make_progress_callback(min_interval: float = 0.05) -> Callable[[str, int, int], None]:
+    """
+    Crea un callback di progresso che limita la frequenza delle scritture.
+    
+    Args:
+        min_interval: Intervallo minimo in secondi tra due aggiornamenti
+        
+    Returns:
+        Callback (fase, corrente, totale) da passare a organize_files
+    """
+    last_emit = 0.0
+    last_phase = None
+    
+    def callback(phase: str, current: int, total: int):
+        nonlocal last_emit, last_phase
+        now = time.monotonic()
+        # Cambio di fase e completamento vengono sempre mostrati
+        if phase == last_phase and current != total and now - last_emit < min_interval:
+            return
+        last_emit = now
+        last_phase = phase
+        print_progress(phase, current, total)
+    
+    return callback
+
+
 def organize_command(args):
     """Esegue il comando di organizzazione."""
+    from core import FileOrganizerCore
+    from io_ops import FileOperationLogger
+    from config import get_config_manager
+    
     config_manager = get_config_manager()
     
     # Validazione parametri
@@ -161,7 +189,7 @@ def organize_command(args):
             str(output_path),
             since_date=since_date,
             until_date=until_date,
-            progress_callback=print_progress
+            progress_callback=make_progress_callback()
         )
         
         print()  # Nuova riga dopo il progresso
@@ -182,15 +210,20 @@ def organize_command(args):
         if result.matches:
             print(f"\nMATCH TROVATI ({len(result.matches)}):")
             print("-" * 80)
+            status = "✓" if not args.dry_run else "→"
+            lines = []
             for match in result.matches:
-                status = "✓" if not args.dry_run else "→"
-                print(f"{status} {match.file_path}")
-                print(f"   Azienda: {match.company_name} (score: {match.match_score:.1f}%)")
-                print(f"   Categoria: {match.category.value}")
-                print(f"   Destinazione: {match.suggested_path}")
+                lines.append(
+                    f"{status} {match.file_path}\n"
+                    f"   Azienda: {match.company_name} (score: {match.match_score:.1f}%)\n"
+                    f"   Categoria: {match.category.value}\n"
+                    f"   Destinazione: {match.suggested_path}\n"
+                )
                 if match.file_date:
-                    print(f"   Data: {match.file_date}")
-                print()
+                    lines.append(f"   Data: {match.file_date}\n")
+                lines.append("\n")
+            # Un'unica scrittura invece di diverse print per ogni match
+            sys.stdout.write("".join(lines))
         
         # Mostra gli errori
         if result.errors:
@@ -209,6 +242,8 @@ def organize_command(args):
 
 def undo_command(args):
     """Esegue il comando di undo."""
+    from io_ops import UndoManager
+    
     log_file = Path(args.log_file)
     
     if not log_file.exists():
@@ -239,18 +274,20 @@ def undo_command(args):
 
 def list_companies_command(args):
     """Elenca le aziende salvate."""
+    from config import get_config_manager
+    
     config_manager = get_config_manager()
-    companies = config_manager.get_all_company_names()
+    profiles = config_manager.get_all_profiles()
     
-    if not companies:
+    if not profiles:
         print("Nessuna azienda salvata.")
         return 0
     
     print("AZIENDE SALVATE:")
     print("-" * 40)
     
-    for company_name in sorted(companies):
-        profile = config_manager.get_company_profile(company_name)
+    for company_name in sorted(profiles):
+        profile = profiles[company_name]
         print(f"• {company_name}")
         if profile.aliases:
             print(f"  Alias: {', '.join(profile.aliases)}")
@@ -262,6 +299,8 @@ def list_companies_command(args):
 
 def add_company_command(args):
     """Aggiunge una nuova azienda."""
+    from config import get_config_manager
+    
     config_manager = get_config_manager()
     
     aliases = []
@@ -270,6 +309,7 @@ def add_company_command(args):
     
     # Genera alias automatici se richiesto
     if args.auto_aliases:
+        from normalize import generate_company_aliases
         auto_aliases = generate_company_aliases(args.name)
         aliases.extend(auto_aliases)
         aliases = list(set(aliases))  # Rimuovi duplicati
@@ -285,9 +325,11 @@ def add_company_command(args):
 
 def remove_company_command(args):
     """Rimuove un'azienda."""
+    from config import get_config_manager
+    
     config_manager = get_config_manager()
     
-    if args.name not in config_manager.get_all_company_names():
+    if config_manager.get_company_profile(args.name) is None:
         print(f"Errore: Azienda '{args.name}' non trovata.")
         return 1
     
@@ -299,6 +341,8 @@ def remove_company_command(args):
 
 def create_parser():
     """Crea il parser degli argomenti."""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="File Organizer - Organizza file aziendali con matching fuzzy",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -357,8 +401,29 @@ Esempi:
     return parser
 
 
+def _fast_dispatch(argv: List[str]) -> Optional[int]:
+    """
+    Esegue direttamente i comandi senza opzioni, senza costruire il parser.
+    
+    Args:
+        argv: Argomenti da riga di comando (senza il nome del programma)
+        
+    Returns:
+        Codice di uscita del comando, o None se serve il parser completo
+    """
+    if argv == ['list-companies']:
+        return list_companies_command(SimpleNamespace())
+    if len(argv) == 2 and argv[0] == 'remove-company' and not argv[1].startswith('-'):
+        return remove_company_command(SimpleNamespace(name=argv[1]))
+    return None
+
+
 def main():
     """Funzione principale della CLI."""
+    exit_code = _fast_dispatch(sys.argv[1:])
+    if exit_code is not None:
+        return exit_code
+    
     parser = create_parser()
     
     # Se non ci sono argomenti, mostra l'help
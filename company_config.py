@@ -3,11 +3,22 @@ Modulo per la gestione della configurazione delle aziende.
 Carica le aziende e i loro alias da un file di configurazione YAML.
 """
 
+import logging
 import os
-import yaml
-from typing import Dict, List, Set, Optional
+import sys
+import threading
+from typing import Dict, FrozenSet, Iterator, List, Set, Optional, Tuple
 from pathlib import Path
 
+from yaml_io import load_yaml, invalidate_yaml_cache, dump_yaml
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:  # Dipendenza opzionale: senza, si usano i controlli `in`
+    ahocorasick = None
+
 
 class CompanyConfig:
     """Classe per gestire la configurazione delle aziende."""
@@ -22,6 +33,19 @@ class CompanyConfig:
         self.companies: Dict[str, Dict] = {}
         self.settings: Dict = {}
         
+        # Regole in minuscolo precalcolate per is_valid_match
+        self._required_keywords_lower: Dict[str, Tuple[str, ...]] = {}
+        self._excluded_standalone_lower: Dict[str, FrozenSet[str]] = {}
+        self._excluded_standalone_max_len: Dict[str, int] = {}
+        
+        # Automa Aho-Corasick su alias e parole chiave (se disponibile),
+        # ricostruito solo al primo utilizzo dopo una modifica delle aziende
+        self._automaton = None
+        self._matcher_stale = True
+        self._matcher_lock = threading.Lock()
+        # Ultime parole chiave trovate, una cache per thread (analisi in parallelo)
+        self._local = threading.local()
+        
         # Percorso predefinito del file di configurazione
         if config_file is None:
             config_file = os.path.join(os.path.dirname(__file__), "companies_config.yaml")
@@ -33,20 +57,23 @@ class CompanyConfig:
         """Carica la configurazione dal file YAML."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f)
+                config_data = load_yaml(self.config_file)
                 
-                self.companies = config_data.get('companies', {})
+                self.companies = self._intern_companies(config_data.get('companies', {}))
                 self.settings = config_data.get('settings', {})
+                self._build_match_rules()
                 
-                print(f"[DEBUG] Configurazione caricata da: {self.config_file}")
-                print(f"[DEBUG] Aziende configurate: {list(self.companies.keys())}")
+                logger.debug("Configurazione caricata da: %s", self.config_file)
+                logger.debug("Aziende configurate: %s", self.companies.keys())
             else:
-                print(f"[DEBUG] File di configurazione non trovato: {self.config_file}")
+                logger.debug("File di configurazione non trovato: %s", self.config_file)
                 self._create_default_config()
         except Exception as e:
-            print(f"[DEBUG] Errore nel caricamento della configurazione: {e}")
+            logger.warning("Errore nel caricamento della configurazione: %s", e)
             self._create_default_config()
+        
+        with self._matcher_lock:
+            self._matcher_stale = True
     
     def _create_default_config(self):
         """Crea una configurazione predefinita."""
@@ -64,18 +91,146 @@ class CompanyConfig:
             }
         }
         
+        self.companies = self._intern_companies(self.companies)
+        
         self.settings = {
             "min_threshold": 92.0,
             "filename_bonus": 15.0,
             "path_penalty": 10.0,
             "generic_words": ["area", "zone", "zona", "document", "file"]
         }
+        
+        self._build_match_rules()
+    
+    # Campi di un'azienda che contengono liste di stringhe
+    _STRING_LIST_FIELDS = ('aliases', 'required_keywords', 'excluded_standalone')
+    
+    @classmethod
+    def _intern_company_data(cls, company_data: Dict) -> Dict:
+        """
+        Converte le liste di stringhe di un'azienda in tuple di stringhe internate,
+        così le parole ripetute tra aziende (es. "spa") condividono lo stesso oggetto.
+        
+        Args:
+            company_data: Dati dell'azienda
+            
+        Returns:
+            Dati dell'azienda con tuple al posto delle liste
+        """
+        company_data = dict(company_data or {})
+        for field in cls._STRING_LIST_FIELDS:
+            if field in company_data:
+                company_data[field] = tuple(sys.intern(str(value)) for value in company_data[field] or ())
+        return company_data
+    
+    @classmethod
+    def _intern_companies(cls, companies: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Applica _intern_company_data a tutte le aziende, internando anche i nomi."""
+        return {
+            sys.intern(str(name)): cls._intern_company_data(data)
+            for name, data in (companies or {}).items()
+        }
+    
+    def _build_match_rules(self):
+        """Precalcola le regole di validazione in minuscolo per tutte le aziende."""
+        self._required_keywords_lower = {}
+        self._excluded_standalone_lower = {}
+        self._excluded_standalone_max_len = {}
+        for company_name in self.companies:
+            self._update_match_rules(company_name)
+    
+    def _update_match_rules(self, company_name: str):
+        """Precalcola le regole di validazione in minuscolo per un'azienda."""
+        # Parole chiave ordinate dalla più lunga: la prima basta per il controllo sulla lunghezza
+        self._required_keywords_lower[company_name] = tuple(sorted(
+            (keyword.lower() for keyword in self.get_required_keywords(company_name)),
+            key=len, reverse=True
+        ))
+        excluded = frozenset(word.lower() for word in self.get_excluded_standalone(company_name))
+        self._excluded_standalone_lower[company_name] = excluded
+        self._excluded_standalone_max_len[company_name] = max(map(len, excluded), default=0)
+    
+    def build_matcher(self):
+        """
+        Costruisce un unico automa Aho-Corasick con alias e parole chiave
+        richieste di tutte le aziende, per cercarli in una sola passata sul testo.
+        Facoltativo: senza chiamarlo, l'automa viene creato al primo utilizzo.
+        """
+        with self._matcher_lock:
+            self._automaton = self._make_automaton()
+            self._matcher_stale = False
+    
+    def _make_automaton(self):
+        """Crea l'automa per le aziende correnti (None se vuoto o senza pyahocorasick)."""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for company_name in self.companies:
+            entries = [(alias, "alias") for alias in self.get_company_aliases(company_name)]
+            entries += [(keyword, "keyword") for keyword in self.get_required_keywords(company_name)]
+            for word, kind in entries:
+                key = word.lower()
+                if not key:
+                    continue
+                # Più aziende possono condividere la stessa parola
+                payloads = automaton.get(key, [])
+                payloads.append((company_name, kind, word))
+                automaton.add_word(key, payloads)
+        
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+    
+    def _get_automaton(self):
+        """Restituisce l'automa, ricostruendolo se le aziende sono cambiate."""
+        if self._matcher_stale:
+            with self._matcher_lock:
+                # Un solo thread ricostruisce: gli altri trovano l'automa già pronto
+                if self._matcher_stale:
+                    self._automaton = self._make_automaton()
+                    self._matcher_stale = False
+        return self._automaton
+    
+    def iter_matches(self, text_lower: str) -> Iterator[Tuple[int, Tuple[str, str, str]]]:
+        """
+        Trova tutti gli alias e le parole chiave presenti in un testo.
+        
+        Args:
+            text_lower: Testo in minuscolo
+            
+        Returns:
+            Iteratore di tuple (indice_fine, (azienda, tipo, parola))
+        """
+        automaton = self._get_automaton()
+        if automaton is None:
+            return
+        for end_index, payloads in automaton.iter(text_lower):
+            for payload in payloads:
+                yield end_index, payload
+    
+    def _keyword_hits(self, text_lower: str) -> Dict[str, Set[str]]:
+        """Parole chiave richieste trovate nel testo, per azienda (ultimo testo in cache)."""
+        automaton = self._get_automaton()
+        # Cache del thread corrente, valida solo per lo stesso automa e lo stesso testo
+        cached = getattr(self._local, 'keyword_hits', None)
+        if cached is not None and cached[0] is automaton and cached[1] == text_lower:
+            return cached[2]
+        
+        hits: Dict[str, Set[str]] = {}
+        for _, (company_name, kind, word) in self.iter_matches(text_lower):
+            if kind == "keyword":
+                hits.setdefault(company_name, set()).add(word.lower())
+        
+        self._local.keyword_hits = (automaton, text_lower, hits)
+        return hits
     
     def get_companies(self) -> Dict[str, Dict]:
         """Restituisce tutte le aziende configurate."""
         return self.companies
     
-    def get_company_aliases(self, company_name: str) -> List[str]:
+    def get_company_aliases(self, company_name: str) -> Tuple[str, ...]:
         """
         Restituisce gli alias di un'azienda.
         
@@ -83,12 +238,12 @@ class CompanyConfig:
             company_name: Nome dell'azienda
             
         Returns:
-            Lista degli alias
+            Tupla degli alias
         """
         company_data = self.companies.get(company_name, {})
-        return company_data.get('aliases', [])
+        return company_data.get('aliases', ())
     
-    def get_required_keywords(self, company_name: str) -> List[str]:
+    def get_required_keywords(self, company_name: str) -> Tuple[str, ...]:
         """
         Restituisce le parole chiave richieste per un'azienda.
         
@@ -96,12 +251,12 @@ class CompanyConfig:
             company_name: Nome dell'azienda
             
         Returns:
-            Lista delle parole chiave richieste
+            Tupla delle parole chiave richieste
         """
         company_data = self.companies.get(company_name, {})
-        return company_data.get('required_keywords', [])
+        return company_data.get('required_keywords', ())
     
-    def get_excluded_standalone(self, company_name: str) -> List[str]:
+    def get_excluded_standalone(self, company_name: str) -> Tuple[str, ...]:
         """
         Restituisce le parole che non possono essere match standalone per un'azienda.
         
@@ -109,10 +264,10 @@ class CompanyConfig:
             company_name: Nome dell'azienda
             
         Returns:
-            Lista delle parole escluse
+            Tupla delle parole escluse
         """
         company_data = self.companies.get(company_name, {})
-        return company_data.get('excluded_standalone', [])
+        return company_data.get('excluded_standalone', ())
     
     def get_setting(self, key: str, default=None):
         """
@@ -127,7 +282,8 @@ class CompanyConfig:
         """
         return self.settings.get(key, default)
     
-    def is_valid_match(self, company_name: str, matched_text: str, full_text: str) -> bool:
+    def is_valid_match(self, company_name: str, matched_text: str, full_text: str,
+                       full_text_lower: Optional[str] = None) -> bool:
         """
         Verifica se un match è valido secondo le regole dell'azienda.
         
@@ -135,27 +291,59 @@ class CompanyConfig:
             company_name: Nome dell'azienda
             matched_text: Testo che ha fatto match
             full_text: Testo completo analizzato
+            full_text_lower: full_text già in minuscolo (opzionale, evita di ricalcolarlo)
             
         Returns:
             True se il match è valido
         """
         # Verifica parole chiave richieste - TUTTE devono essere presenti
-        required_keywords = self.get_required_keywords(company_name)
+        required_keywords = self._required_keywords_lower.get(company_name, ())
         if required_keywords:
-            full_text_lower = full_text.lower()
+            if full_text_lower is None:
+                full_text_lower = full_text.lower()
+            # Testo più corto della parola chiave più lunga: non può contenerle tutte
+            if len(required_keywords[0]) > len(full_text_lower):
+                return False
+            if self._get_automaton() is not None:
+                found = self._keyword_hits(full_text_lower).get(company_name, ())
+            else:
+                found = full_text_lower
             # Cambiato da 'any' a 'all' - TUTTE le parole chiave devono essere presenti
-            if not all(keyword.lower() in full_text_lower for keyword in required_keywords):
+            if not all(keyword in found for keyword in required_keywords):
                 return False
         
         # Verifica parole escluse standalone
-        excluded_standalone = self.get_excluded_standalone(company_name)
+        excluded_standalone = self._excluded_standalone_lower.get(company_name)
         if excluded_standalone:
-            matched_text_lower = matched_text.lower().strip()
-            if matched_text_lower in [word.lower() for word in excluded_standalone]:
+            candidate = matched_text.strip()
+            # Più lungo di ogni parola esclusa: inutile convertirlo in minuscolo
+            if (len(candidate) <= self._excluded_standalone_max_len[company_name]
+                    and candidate.lower() in excluded_standalone):
                 return False
         
         return True
     
+    def match_all(self, matched_text: str, full_text: str,
+                  company_names: Optional[List[str]] = None) -> List[str]:
+        """
+        Verifica lo stesso match per più aziende, convertendo il testo in minuscolo una sola volta.
+        
+        Args:
+            matched_text: Testo che ha fatto match
+            full_text: Testo completo analizzato
+            company_names: Aziende da verificare (default: tutte)
+            
+        Returns:
+            Lista delle aziende per cui il match è valido
+        """
+        if company_names is None:
+            company_names = self.companies
+        full_text_lower = full_text.lower()
+        return [
+            company_name for company_name in company_names
+            if self.is_valid_match(company_name, matched_text, full_text, full_text_lower)
+        ]
+    
     def add_company(self, company_name: str, aliases: List[str] = None, 
                    required_keywords: List[str] = None, 
                    excluded_standalone: List[str] = None):
@@ -179,24 +367,53 @@ class CompanyConfig:
         if excluded_standalone:
             company_data['excluded_standalone'] = excluded_standalone
         
-        self.companies[company_name] = company_data
+        company_name = sys.intern(company_name)
+        self.companies[company_name] = self._intern_company_data(company_data)
+        self._update_match_rules(company_name)
+        # Ricostruzione rimandata al primo utilizzo: caricare N aziende non ricrea N automi
+        with self._matcher_lock:
+            self._matcher_stale = True
     
     def save_config(self):
         """Salva la configurazione corrente nel file YAML."""
         try:
+            # Tuple di nuovo in liste, per un YAML senza tag python/tuple
+            companies = {
+                name: {
+                    key: list(value) if isinstance(value, tuple) else value
+                    for key, value in company_data.items()
+                }
+                for name, company_data in self.companies.items()
+            }
             config_data = {
-                'companies': self.companies,
+                'companies': companies,
                 'settings': self.settings
             }
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, 
-                         allow_unicode=True, indent=2)
+            dump_yaml(self.config_file, config_data, indent=2)
             
-            print(f"[DEBUG] Configurazione salvata in: {self.config_file}")
+            logger.debug("Configurazione salvata in: %s", self.config_file)
         except Exception as e:
-            print(f"[DEBUG] Errore nel salvataggio della configurazione: {e}")
+            logger.error("Errore nel salvataggio della configurazione: %s", e)
+        finally:
+            invalidate_yaml_cache()
 
 
-# Istanza globale della configurazione
-company_config = CompanyConfig()
\ No newline at end of file
+# Istanza globale della configurazione (creata al primo utilizzo)
+_company_config: Optional[CompanyConfig] = None
+_company_config_lock = threading.Lock()
+
+
+def get_company_config() -> CompanyConfig:
+    """
+    Ottiene l'istanza globale della configurazione delle aziende.
+    
+    Returns:
+        Configurazione delle aziende
+    """
+    global _company_config
+    if _company_config is None:
+        with _company_config_lock:
+            if _company_config is None:
+                _company_config = CompanyConfig()
+    return _company_config
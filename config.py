@@ -3,15 +3,40 @@ Modulo per la gestione della configurazione.
 Gestisce il caricamento e salvataggio delle configurazioni in formato YAML.
 """
 
+import atexit
+import json
 import os
+import textwrap
+import threading
+import weakref
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Deque, Dict, Iterable, List, Optional, Set, Any
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+from yaml_io import load_yaml, invalidate_yaml_cache, dump_yaml, write_atomic, open_atomic
 
-@dataclass
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """
+    Converte una data ISO 8601 (in cache: profili modificati insieme
+    condividono spesso la stessa data).
+    
+    Args:
+        value: Data in formato ISO
+        
+    Returns:
+        Data convertita
+    """
+    return datetime.fromisoformat(value)
+
+
+@dataclass(slots=True)
 class CompanyProfile:
     """Profilo di un'azienda con i suoi alias."""
     name: str
@@ -31,11 +56,15 @@ class CompanyProfile:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CompanyProfile':
         """Crea un profilo da dizionario."""
+        created_at = data.get('created_at')
+        last_used = data.get('last_used')
+        # L'ora corrente serve solo se manca una delle due date
+        now = datetime.now() if created_at is None or last_used is None else None
         return cls(
             name=data['name'],
             aliases=data.get('aliases', []),
-            created_at=datetime.fromisoformat(data.get('created_at', datetime.now().isoformat())),
-            last_used=datetime.fromisoformat(data.get('last_used', datetime.now().isoformat()))
+            created_at=_parse_iso(created_at) if created_at is not None else now,
+            last_used=_parse_iso(last_used) if last_used is not None else now
         )
 
 
@@ -78,9 +107,33 @@ class AppSettings:
             ]
 
 
+# Nomi dei campi di AppSettings accettati da file e importazioni
+_SETTING_FIELDS = frozenset(field.name for field in fields(AppSettings))
+
+# Valori predefiniti: su file vengono salvati solo i campi che ne differiscono
+_DEFAULT_SETTINGS = asdict(AppSettings())
+
+
+# Gestori attivi: all'uscita vengono salvate le modifiche ancora in attesa
+_live_managers: "weakref.WeakSet[ConfigManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_managers():
+    """Scrive le modifiche in attesa di tutti i gestori (registrata una sola volta)."""
+    for manager in list(_live_managers):
+        manager.flush()
+
+
 class ConfigManager:
     """Gestore della configurazione dell'applicazione."""
     
+    # Attesa (secondi) prima di scrivere su disco le modifiche accumulate
+    SAVE_DELAY = 0.5
+    
+    # Numero massimo di file recenti conservati
+    MAX_RECENT_FILES = 10
+    
     def __init__(self, config_dir: str = None):
         """
         Inizializza il gestore della configurazione.
@@ -101,12 +154,26 @@ class ConfigManager:
         # Percorsi dei file di configurazione
         self.settings_file = self.config_dir / 'settings.yaml'
         self.companies_file = self.config_dir / 'companies.yaml'
-        self.recent_files_file = self.config_dir / 'recent.yaml'
+        self.recent_files_file = self.config_dir / 'recent.json'
+        # Formato precedente, migrato al primo caricamento
+        self.legacy_recent_files_file = self.config_dir / 'recent.yaml'
+        
+        # Salvataggi differiti: modifiche ravvicinate producono una sola scrittura
+        self._dirty: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        # Protegge dati e sezioni modificate: il timer li legge da un altro thread
+        self._flush_lock = threading.RLock()
+        # Una scrittura alla volta: flush() attende quella già avviata dal timer
+        self._write_lock = threading.RLock()
         
         # Carica le configurazioni
         self.settings = self._load_settings()
         self.companies: Dict[str, CompanyProfile] = self._load_companies()
-        self.recent_files: List[str] = self._load_recent_files()
+        self.recent_files: Deque[str] = deque(maxlen=self.MAX_RECENT_FILES)
+        self._recent_set: Set[str] = set()
+        self._set_recent_files(self._load_recent_files())
+        
+        _live_managers.add(self)
     
     def _load_settings(self) -> AppSettings:
         """
@@ -119,13 +186,12 @@ class ConfigManager:
             return AppSettings()
         
         try:
-            with open(self.settings_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or {}
+            data = load_yaml(self.settings_file) or {}
             
             # Crea l'oggetto settings dai dati YAML
             settings = AppSettings()
             for key, value in data.items():
-                if hasattr(settings, key):
+                if key in _SETTING_FIELDS:
                     setattr(settings, key, value)
             
             return settings
@@ -145,9 +211,16 @@ class ConfigManager:
             return {}
         
         try:
-            with open(self.companies_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or {}
+            data = load_yaml(self.companies_file) or {}
+            
+            # Caso comune: tutti i profili sono validi
+            try:
+                return {name: CompanyProfile.from_dict(profile_data)
+                        for name, profile_data in data.items()}
+            except Exception:
+                pass
             
+            # Almeno un profilo non valido: carica gli altri e segnala gli errori
             companies = {}
             for name, profile_data in data.items():
                 try:
@@ -168,55 +241,135 @@ class ConfigManager:
         Returns:
             Lista dei percorsi dei file recenti
         """
-        if not self.recent_files_file.exists():
-            return []
-        
         try:
-            with open(self.recent_files_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or []
+            if self.recent_files_file.exists():
+                with open(self.recent_files_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f) or []
+            elif self.legacy_recent_files_file.exists():
+                data = load_yaml(self.legacy_recent_files_file) or []
+                self._migrate_legacy_recent_files(data)
+            else:
+                return []
             
-            # Filtra solo i file che esistono ancora
+            # Filtra solo i file che esistono ancora (controlli in parallelo:
+            # su dischi di rete ogni stat() può bloccare a lungo)
             existing_files = []
-            for file_path in data:
-                if Path(file_path).exists():
-                    existing_files.append(file_path)
+            if data:
+                with ThreadPoolExecutor(max_workers=min(16, len(data))) as executor:
+                    exists = list(executor.map(os.path.exists, data))
+                existing_files = [path for path, found in zip(data, exists) if found]
             
-            return existing_files[:10]  # Mantieni solo gli ultimi 10
+            return existing_files[:self.MAX_RECENT_FILES]  # Mantieni solo gli ultimi
             
         except Exception as e:
             print(f"Errore nel caricamento dei file recenti: {e}")
             return []
     
-    def save_settings(self):
-        """Salva le impostazioni su file."""
+    def _migrate_legacy_recent_files(self, data: List[str]):
+        """
+        Converte il vecchio recent.yaml nel formato JSON e lo rimuove.
+        
+        Args:
+            data: Lista dei file recenti letta dal file YAML
+        """
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                yaml.dump(asdict(self.settings), f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=True)
+            content = json.dumps(data, ensure_ascii=False)
+            write_atomic(self.recent_files_file, content.encode('utf-8'))
+            self.legacy_recent_files_file.unlink()
         except Exception as e:
-            print(f"Errore nel salvataggio delle impostazioni: {e}")
+            print(f"Errore nella migrazione dei file recenti: {e}")
+    
+    def _mark_dirty(self, section: str):
+        """
+        Segna una sezione come modificata e (ri)programma il salvataggio.
+        
+        Args:
+            section: Sezione da salvare ("settings", "companies" o "recent")
+        """
+        with self._flush_lock:
+            self._dirty.add(section)
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Scrive subito su disco le sezioni con modifiche in attesa."""
+        # Se il timer sta già scrivendo, attende che finisca (es. all'uscita)
+        with self._write_lock:
+            with self._flush_lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                dirty = set(self._dirty)
+            
+            if 'settings' in dirty:
+                self.save_settings()
+            if 'companies' in dirty:
+                self.save_companies()
+            if 'recent' in dirty:
+                self.save_recent_files()
+    
+    def _take_snapshot(self, section: str, build):
+        """
+        Toglie una sezione da quelle modificate e ne copia i dati sotto lock.
+        
+        Args:
+            section: Sezione da salvare
+            build: Funzione che restituisce la copia dei dati da scrivere
+            
+        Returns:
+            Copia dei dati, scrivibile senza lock
+        """
+        with self._flush_lock:
+            self._dirty.discard(section)
+            return build()
+    
+    def _write_failed(self, section: str):
+        """Rimette in attesa una sezione la cui scrittura non è riuscita."""
+        with self._flush_lock:
+            self._dirty.add(section)
+    
+    def save_settings(self):
+        """Salva le impostazioni su file."""
+        with self._write_lock:
+            changed = self._take_snapshot('settings', lambda: {
+                key: value for key, value in asdict(self.settings).items()
+                if value != _DEFAULT_SETTINGS[key]
+            })
+            try:
+                dump_yaml(self.settings_file, changed, sort_keys=True)
+            except Exception as e:
+                self._write_failed('settings')
+                print(f"Errore nel salvataggio delle impostazioni: {e}")
+            finally:
+                invalidate_yaml_cache()
     
     def save_companies(self):
         """Salva i profili aziendali su file."""
-        try:
-            data = {}
-            for name, profile in self.companies.items():
-                data[name] = profile.to_dict()
-            
-            with open(self.companies_file, 'w', encoding='utf-8') as f:
-                yaml.dump(data, f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=True)
-        except Exception as e:
-            print(f"Errore nel salvataggio dei profili aziendali: {e}")
+        with self._write_lock:
+            data = self._take_snapshot('companies', lambda: {
+                name: profile.to_dict() for name, profile in self.companies.items()
+            })
+            try:
+                dump_yaml(self.companies_file, data, sort_keys=True)
+            except Exception as e:
+                self._write_failed('companies')
+                print(f"Errore nel salvataggio dei profili aziendali: {e}")
+            finally:
+                invalidate_yaml_cache()
     
     def save_recent_files(self):
         """Salva la lista dei file recenti."""
-        try:
-            with open(self.recent_files_file, 'w', encoding='utf-8') as f:
-                yaml.dump(self.recent_files, f, default_flow_style=False, 
-                         allow_unicode=True)
-        except Exception as e:
-            print(f"Errore nel salvataggio dei file recenti: {e}")
+        with self._write_lock:
+            recent = self._take_snapshot('recent', lambda: list(self.recent_files))
+            try:
+                content = json.dumps(recent, ensure_ascii=False)
+                write_atomic(self.recent_files_file, content.encode('utf-8'))
+            except Exception as e:
+                self._write_failed('recent')
+                print(f"Errore nel salvataggio dei file recenti: {e}")
     
     def add_company_profile(self, name: str, aliases: List[str] = None):
         """
@@ -237,8 +390,9 @@ class ConfigManager:
             last_used=now
         )
         
-        self.companies[name] = profile
-        self.save_companies()
+        with self._flush_lock:
+            self.companies[name] = profile
+            self._mark_dirty('companies')
     
     def update_company_profile(self, name: str, aliases: List[str]):
         """
@@ -248,10 +402,11 @@ class ConfigManager:
             name: Nome dell'azienda
             aliases: Nuova lista di alias
         """
-        if name in self.companies:
-            self.companies[name].aliases = aliases
-            self.companies[name].last_used = datetime.now()
-            self.save_companies()
+        with self._flush_lock:
+            if name in self.companies:
+                self.companies[name].aliases = aliases
+                self.companies[name].last_used = datetime.now()
+                self._mark_dirty('companies')
     
     def remove_company_profile(self, name: str):
         """
@@ -260,9 +415,10 @@ class ConfigManager:
         Args:
             name: Nome dell'azienda da rimuovere
         """
-        if name in self.companies:
-            del self.companies[name]
-            self.save_companies()
+        with self._flush_lock:
+            if name in self.companies:
+                del self.companies[name]
+                self._mark_dirty('companies')
     
     def get_company_profile(self, name: str) -> Optional[CompanyProfile]:
         """
@@ -276,6 +432,15 @@ class ConfigManager:
         """
         return self.companies.get(name)
     
+    def get_all_profiles(self) -> Dict[str, CompanyProfile]:
+        """
+        Ottiene tutti i profili aziendali in un'unica chiamata.
+        
+        Returns:
+            Dizionario nome azienda -> profilo
+        """
+        return dict(self.companies)
+    
     def get_all_company_names(self) -> List[str]:
         """
         Ottiene tutti i nomi delle aziende.
@@ -292,17 +457,19 @@ class ConfigManager:
         Args:
             file_path: Percorso del file
         """
-        # Rimuovi il file se già presente
-        if file_path in self.recent_files:
-            self.recent_files.remove(file_path)
-        
-        # Aggiungi all'inizio
-        self.recent_files.insert(0, file_path)
-        
-        # Mantieni solo gli ultimi 10
-        self.recent_files = self.recent_files[:10]
-        
-        self.save_recent_files()
+        with self._flush_lock:
+            # Rimuovi il file se già presente
+            if file_path in self._recent_set:
+                self.recent_files.remove(file_path)
+            elif len(self.recent_files) == self.MAX_RECENT_FILES:
+                # La deque scarta il più vecchio: toglilo anche dall'insieme
+                self._recent_set.discard(self.recent_files[-1])
+            
+            # Aggiungi all'inizio
+            self.recent_files.appendleft(file_path)
+            self._recent_set.add(file_path)
+            
+            self._mark_dirty('recent')
     
     def get_recent_files(self) -> List[str]:
         """
@@ -311,7 +478,21 @@ class ConfigManager:
         Returns:
             Lista dei percorsi dei file recenti
         """
-        return self.recent_files.copy()
+        return list(self.recent_files)
+    
+    def _set_recent_files(self, files: Iterable[str]):
+        """
+        Sostituisce la lista dei file recenti.
+        
+        Args:
+            files: Percorsi dei file, dal più recente
+        """
+        files = list(files)[:self.MAX_RECENT_FILES]
+        with self._flush_lock:
+            self.recent_files.clear()
+            # Solo i primi: con maxlen la deque scarterebbe invece i più recenti
+            self.recent_files.extend(files)
+            self._recent_set = set(self.recent_files)
     
     def export_config(self, export_path: str):
         """
@@ -320,17 +501,23 @@ class ConfigManager:
         Args:
             export_path: Percorso del file di esportazione
         """
-        export_data = {
-            'settings': asdict(self.settings),
-            'companies': {name: profile.to_dict() for name, profile in self.companies.items()},
-            'recent_files': self.recent_files,
-            'export_date': datetime.now().isoformat()
-        }
+        dump_options = {'default_flow_style': False, 'allow_unicode': True, 'sort_keys': True}
         
         try:
-            with open(export_path, 'w', encoding='utf-8') as f:
-                yaml.dump(export_data, f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=True)
+            # Una sezione alla volta, in ordine alfabetico come il dump unico:
+            # i profili vengono serializzati uno per volta senza costruire
+            # il dizionario completo dell'esportazione
+            with open_atomic(export_path) as f:
+                if self.companies:
+                    f.write('companies:\n')
+                    for name in sorted(self.companies):
+                        entry = yaml.dump({name: self.companies[name].to_dict()}, **dump_options)
+                        f.write(textwrap.indent(entry, '  '))
+                else:
+                    f.write('companies: {}\n')
+                yaml.dump({'export_date': datetime.now().isoformat()}, f, **dump_options)
+                yaml.dump({'recent_files': list(self.recent_files)}, f, **dump_options)
+                yaml.dump({'settings': asdict(self.settings)}, f, **dump_options)
         except Exception as e:
             raise Exception(f"Errore nell'esportazione della configurazione: {e}")
     
@@ -343,37 +530,38 @@ class ConfigManager:
             merge: Se True, unisce con la configurazione esistente
         """
         try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            data = load_yaml(import_path)
             
-            # Importa le impostazioni
-            if 'settings' in data:
-                if merge:
-                    # Aggiorna solo i campi presenti
-                    for key, value in data['settings'].items():
-                        if hasattr(self.settings, key):
-                            setattr(self.settings, key, value)
-                else:
-                    # Sostituisci completamente
-                    self.settings = AppSettings()
-                    for key, value in data['settings'].items():
-                        if hasattr(self.settings, key):
-                            setattr(self.settings, key, value)
-            
-            # Importa i profili aziendali
-            if 'companies' in data:
-                if not merge:
-                    self.companies.clear()
+            # Modifiche sotto lock: un salvataggio differito può leggere i dati in parallelo
+            with self._flush_lock:
+                # Importa le impostazioni
+                if 'settings' in data:
+                    if merge:
+                        # Aggiorna solo i campi presenti
+                        for key, value in data['settings'].items():
+                            if key in _SETTING_FIELDS:
+                                setattr(self.settings, key, value)
+                    else:
+                        # Sostituisci completamente
+                        self.settings = AppSettings()
+                        for key, value in data['settings'].items():
+                            if key in _SETTING_FIELDS:
+                                setattr(self.settings, key, value)
                 
-                for name, profile_data in data['companies'].items():
-                    try:
-                        self.companies[name] = CompanyProfile.from_dict(profile_data)
-                    except Exception as e:
-                        print(f"Errore nell'importazione del profilo {name}: {e}")
-            
-            # Importa i file recenti
-            if 'recent_files' in data and not merge:
-                self.recent_files = data['recent_files'][:10]
+                # Importa i profili aziendali
+                if 'companies' in data:
+                    if not merge:
+                        self.companies.clear()
+                    
+                    for name, profile_data in data['companies'].items():
+                        try:
+                            self.companies[name] = CompanyProfile.from_dict(profile_data)
+                        except Exception as e:
+                            print(f"Errore nell'importazione del profilo {name}: {e}")
+                
+                # Importa i file recenti
+                if 'recent_files' in data and not merge:
+                    self._set_recent_files(data['recent_files'])
             
             # Salva tutto
             self.save_settings()
@@ -384,8 +572,9 @@ class ConfigManager:
             raise Exception(f"Errore nell'importazione della configurazione: {e}")
 
 
-# Istanza globale del gestore configurazione
-config_manager = ConfigManager()
+# Istanza globale del gestore configurazione (creata al primo utilizzo)
+_config_manager: Optional[ConfigManager] = None
+_config_manager_lock = threading.Lock()
 
 
 def get_config_manager() -> ConfigManager:
@@ -395,4 +584,9 @@ def get_config_manager() -> ConfigManager:
     Returns:
         Gestore configurazione
     """
-    return config_manager
\ No newline at end of file
+    global _config_manager
+    if _config_manager is None:
+        with _config_manager_lock:
+            if _config_manager is None:
+                _config_manager = ConfigManager()
+    return _config_manager
@@ -3,11 +3,14 @@ Modulo core per l'organizzazione dei file.
 Contiene la logica principale per il matching fuzzy e l'organizzazione dei file.
 """
 
+import logging
 import os
 import re
+from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Set, Callable
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Set, Callable
 from dataclasses import dataclass
 from rapidfuzz import fuzz, process
 
@@ -16,6 +19,8 @@ from file_types import FileCategory, get_file_category
 from io_ops import FileOrganizer, FileOperationLogger
 from company_config import CompanyConfig
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class FileMatch:
@@ -42,27 +47,38 @@ class OrganizationResult:
     errors: List[str]
 
 
+# Pattern delle date nei nomi file, in ordine di priorità (compilati una sola volta)
+_DATE_PATTERNS = (
+    # YYYY-MM-DD
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'), lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),
+    # DD-MM-YYYY, DD/MM/YYYY
+    (re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'), lambda m: (int(m.group(3)), int(m.group(2)), int(m.group(1)))),
+    # YYYY/MM/DD
+    (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),
+    # YYYYMMDD
+    (re.compile(r'(\d{8})'), lambda m: (int(m.group(1)[:4]), int(m.group(1)[4:6]), int(m.group(1)[6:8]))),
+    # DD-MM-YY, DD/MM/YY (assumendo anni 2000+)
+    (re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})'), lambda m: (2000 + int(m.group(3)), int(m.group(2)), int(m.group(1)))),
+)
+
+# Condizione necessaria per tutti i pattern: cifra-separatore-cifra oppure 8 cifre
+_DATE_CANDIDATE_PATTERN = re.compile(r'\d[/-]\d|\d{8}')
+
+# Forme societarie che da sole non identificano un'azienda
+_COMPANY_FORMS = frozenset({
+    'spa', 's.p.a', 's.p.a.', 'srl', 's.r.l', 's.r.l.',
+    'sas', 's.a.s', 's.a.s.', 'snc', 's.n.c', 's.n.c.',
+    'ltd', 'inc', 'corp', 'llc', 'gmbh', 'ag', 'sa', 'bv', 'nv'
+})
+
+
 class DateExtractor:
     """Classe per estrarre date dai nomi dei file."""
     
     def __init__(self):
         """Inizializza l'estrattore di date."""
-        self._compile_patterns()
-    
-    def _compile_patterns(self):
-        """Compila i pattern regex per le date."""
-        self.date_patterns = [
-            # YYYY-MM-DD
-            (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'), lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),
-            # DD-MM-YYYY, DD/MM/YYYY
-            (re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'), lambda m: (int(m.group(3)), int(m.group(2)), int(m.group(1)))),
-            # YYYY/MM/DD
-            (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),
-            # YYYYMMDD
-            (re.compile(r'(\d{8})'), lambda m: (int(m.group(1)[:4]), int(m.group(1)[4:6]), int(m.group(1)[6:8]))),
-            # DD-MM-YY, DD/MM/YY (assumendo anni 2000+)
-            (re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})'), lambda m: (2000 + int(m.group(3)), int(m.group(2)), int(m.group(1)))),
-        ]
+        self.date_patterns = _DATE_PATTERNS
+        self.date_candidate_pattern = _DATE_CANDIDATE_PATTERN
     
     def extract_date_from_filename(self, filename: str) -> Optional[date]:
         """
@@ -74,32 +90,38 @@ class DateExtractor:
         Returns:
             Data estratta o None se non trovata
         """
+        # Un'unica scansione esclude subito i nomi senza date possibili
+        if not self.date_candidate_pattern.search(filename):
+            return None
+        
         for pattern, parser in self.date_patterns:
             match = pattern.search(filename)
             if match:
-                try:
-                    year, month, day = parser(match)
-                    # Validazione base
-                    if 1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-                        return date(year, month, day)
-                except (ValueError, IndexError):
-                    continue
+                year, month, day = parser(match)
+                # Validazione completa (anche dei giorni del mese): le date
+                # impossibili passano al pattern successivo senza eccezioni
+                if (1900 <= year <= 2100 and 1 <= month <= 12
+                        and 1 <= day <= monthrange(year, month)[1]):
+                    return date(year, month, day)
         
         return None
     
-    def extract_date_from_file_stats(self, file_path: str) -> Optional[date]:
+    def extract_date_from_file_stats(self, file_path: str,
+                                     file_stat: os.stat_result = None) -> Optional[date]:
         """
         Estrae la data dalle statistiche del file.
         
         Args:
             file_path: Percorso del file
+            file_stat: Statistiche già lette (evita una nuova chiamata a stat)
             
         Returns:
             Data di modifica del file
         """
         try:
-            stat = os.stat(file_path)
-            return datetime.fromtimestamp(stat.st_mtime).date()
+            stat = file_stat if file_stat is not None else os.stat(file_path)
+            # Direttamente la data locale, senza passare da un datetime
+            return date.fromtimestamp(stat.st_mtime)
         except (OSError, ValueError):
             return None
 
@@ -107,6 +129,25 @@ class DateExtractor:
 class CompanyMatcher:
     """Classe per il matching fuzzy dei nomi aziendali."""
     
+    # Scorer combinati: per ogni alias vale il punteggio massimo
+    SCORERS = (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio, fuzz.token_set_ratio)
+    
+    # Bonus per alias contenuto nel testo (o viceversa)
+    CONTAINMENT_BONUS = 10
+    
+    # Bonus per i match trovati nel nome del file (rispetto alle cartelle)
+    FILENAME_BONUS = 15
+    
+    # Numero massimo di cartelle con match tenuti in cache
+    PARENT_CACHE_SIZE = 4096
+    
+    # Numero massimo di testi (frammenti e combinazioni di parole) con match in cache
+    MATCH_CACHE_SIZE = 16384
+    
+    # Soglia minima per il prefiltro a trigrammi: con soglie alte un alias senza
+    # trigrammi (o parole) in comune con il testo non può raggiungere la soglia
+    PREFILTER_MIN_THRESHOLD = 92.0
+    
     def __init__(self, threshold: float = 92.0):
         """
         Inizializza il matcher.
@@ -119,6 +160,22 @@ class CompanyMatcher:
         self.company_aliases: Dict[str, List[str]] = {}
         self.config = CompanyConfig()
         
+        # Alias di tutte le aziende in un'unica lista, per lo scoring in blocco
+        self._flat_aliases: List[str] = []
+        self._alias_owners: List[str] = []
+        self._flat_aliases_stale = False
+        
+        # Indice inverso trigramma/parola -> indici degli alias che lo contengono;
+        # gli alias senza parole di almeno 3 caratteri sono sempre candidati
+        self._alias_index: Dict[str, List[int]] = {}
+        self._short_aliases: List[int] = []
+        
+        # Match delle cartelle già analizzate: (cartella, soglia) -> match
+        self._parent_matches_cache: Dict[Tuple[str, float], Tuple[Tuple[str, float, str], ...]] = {}
+        
+        # Miglior match dei testi normalizzati già valutati: (testo, soglia) -> match
+        self._match_cache: Dict[Tuple[str, float], Tuple[Optional[str], float, str]] = {}
+        
         # Carica automaticamente le aziende dalla configurazione
         self._load_companies_from_config()
     
@@ -149,10 +206,129 @@ class CompanyMatcher:
         # Normalizza gli alias forniti
         normalized_aliases = [self.normalizer.normalize(alias) for alias in aliases]
         
-        # Combina tutti gli alias
-        all_aliases = list(set(auto_aliases + normalized_aliases + [normalized_name]))
+        # Combina tutti gli alias (senza duplicati, in ordine stabile)
+        all_aliases = list(dict.fromkeys(auto_aliases + normalized_aliases + [normalized_name]))
+        
+        if company_name in self.company_aliases:
+            # Azienda ridefinita: la lista piatta va ricostruita
+            self._flat_aliases_stale = True
+        elif not self._flat_aliases_stale:
+            # Nuova azienda: basta accodare i suoi alias
+            for alias in all_aliases:
+                if alias:
+                    self._index_alias(self._alias_index, self._short_aliases,
+                                      alias, len(self._flat_aliases))
+                    self._flat_aliases.append(alias)
+                    self._alias_owners.append(company_name)
         
         self.company_aliases[company_name] = all_aliases
+        self._parent_matches_cache.clear()
+        self._match_cache.clear()
+    
+    def _rebuild_flat_aliases(self):
+        """Ricostruisce la lista piatta degli alias e delle aziende corrispondenti."""
+        # Costruite in locale e poi assegnate: sicuro anche con più thread di analisi
+        flat_aliases = []
+        alias_owners = []
+        alias_index: Dict[str, List[int]] = {}
+        short_aliases: List[int] = []
+        for company_name, aliases in self.company_aliases.items():
+            for alias in aliases:
+                if alias:
+                    self._index_alias(alias_index, short_aliases, alias, len(flat_aliases))
+                    flat_aliases.append(alias)
+                    alias_owners.append(company_name)
+        self._flat_aliases, self._alias_owners = flat_aliases, alias_owners
+        self._alias_index, self._short_aliases = alias_index, short_aliases
+        self._flat_aliases_stale = False
+    
+    def build_index(self):
+        """
+        Prepara subito la lista piatta degli alias e l'indice inverso, se non
+        aggiornati, invece di farlo alla prima ricerca (magari in un thread di analisi).
+        """
+        if self._flat_aliases_stale:
+            self._rebuild_flat_aliases()
+    
+    @staticmethod
+    def _index_keys(text: str) -> Set[str]:
+        """
+        Chiavi dell'indice inverso di un testo: le sue parole e i trigrammi
+        interni a ciascuna parola.
+        
+        Args:
+            text: Testo normalizzato
+            
+        Returns:
+            Insieme di parole e trigrammi
+        """
+        keys = set()
+        for word in text.split():
+            keys.add(word)
+            keys.update(word[i:i + 3] for i in range(len(word) - 2))
+        return keys
+    
+    def _index_alias(self, alias_index: Dict[str, List[int]], short_aliases: List[int],
+                     alias: str, index: int):
+        """Aggiunge un alias all'indice inverso (o agli alias sempre candidati)."""
+        if all(len(word) < 3 for word in alias.split()):
+            short_aliases.append(index)
+        for key in self._index_keys(alias):
+            alias_index.setdefault(key, []).append(index)
+    
+    def _candidate_aliases(self, normalized_text: str) -> Optional[Set[int]]:
+        """
+        Indici degli alias con almeno una parola o un trigramma in comune col testo.
+        
+        Args:
+            normalized_text: Testo normalizzato
+            
+        Returns:
+            Insieme di indici, o None se il testo non ha parole di almeno 3
+            caratteri (in quel caso il prefiltro non è sicuro)
+        """
+        if all(len(word) < 3 for word in normalized_text.split()):
+            return None
+        
+        candidates: Set[int] = set(self._short_aliases)
+        alias_index = self._alias_index
+        for key in self._index_keys(normalized_text):
+            indices = alias_index.get(key)
+            if indices:
+                candidates.update(indices)
+        return candidates
+    
+    def _score_aliases(self, normalized_text: str) -> Dict[int, float]:
+        """
+        Calcola in blocco (in C, con rapidfuzz.process) il punteggio massimo
+        dei quattro scorer per ogni alias che può ancora superare la soglia.
+        
+        Args:
+            normalized_text: Testo normalizzato
+            
+        Returns:
+            Dizionario indice alias -> punteggio (senza bonus)
+        """
+        # Con il bonus di contenimento un alias può salire fino a +10
+        cutoff = max(self.threshold - self.CONTAINMENT_BONUS, 0)
+        
+        # Con soglie alte valuta solo gli alias con parole o trigrammi in comune
+        choices = self._flat_aliases
+        if self.threshold >= self.PREFILTER_MIN_THRESHOLD:
+            candidates = self._candidate_aliases(normalized_text)
+            if candidates is not None:
+                flat_aliases = self._flat_aliases
+                choices = {index: flat_aliases[index] for index in sorted(candidates)}
+        
+        scores: Dict[int, float] = {}
+        for scorer in self.SCORERS:
+            for _, score, index in process.extract(
+                normalized_text, choices, scorer=scorer,
+                limit=None, score_cutoff=cutoff
+            ):
+                if score > scores.get(index, -1.0):
+                    scores[index] = score
+        return scores
     
     def find_best_match(self, text: str) -> Tuple[Optional[str], float, str]:
         """
@@ -168,44 +344,70 @@ class CompanyMatcher:
             return None, 0.0, ""
         
         # Normalizza il testo di input
-        normalized_text = self.normalizer.normalize(text)
+        return self.find_best_match_normalized(self.normalizer.normalize(text))
+    
+    def find_best_match_normalized(self, normalized_text: str) -> Tuple[Optional[str], float, str]:
+        """
+        Come find_best_match, per un testo già normalizzato.
         
-        if not normalized_text:
+        Args:
+            normalized_text: Testo già passato da CompanyNameNormalizer.normalize
+            
+        Returns:
+            Tupla (nome_azienda, score, testo_matchato)
+        """
+        if not self.company_aliases or not normalized_text:
             return None, 0.0, ""
         
+        # Le stesse combinazioni di parole ricorrono nello stesso nome file
+        # e in molti file diversi: ognuna viene valutata una volta sola
+        key = (normalized_text, self.threshold)
+        cached = self._match_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._find_best_match_uncached(normalized_text)
+        if len(self._match_cache) >= self.MATCH_CACHE_SIZE:
+            self._match_cache.clear()
+        self._match_cache[key] = result
+        return result
+    
+    def _find_best_match_uncached(self, normalized_text: str) -> Tuple[Optional[str], float, str]:
+        """Esegue il matching vero e proprio (vedi find_best_match_normalized)."""
         best_company = None
         best_score = 0.0
         best_matched_text = ""
         
-        # Cerca in tutti gli alias di tutte le aziende
-        for company_name, aliases in self.company_aliases.items():
-            for alias in aliases:
-                if not alias:
-                    continue
-                
-                # Calcola diversi tipi di score
-                scores = [
-                    fuzz.ratio(normalized_text, alias),
-                    fuzz.partial_ratio(normalized_text, alias),
-                    fuzz.token_sort_ratio(normalized_text, alias),
-                    fuzz.token_set_ratio(normalized_text, alias)
-                ]
-                
-                # Usa il punteggio massimo
-                score = max(scores)
-                
-                # Bonus per match esatti
-                if normalized_text == alias:
-                    score = 100.0
-                elif alias in normalized_text or normalized_text in alias:
-                    score = min(score + 10, 100.0)
-                
-                if score > best_score and score >= self.threshold:
-                    # Verifica se il match è valido secondo le regole dell'azienda
-                    if self.config.is_valid_match(company_name, alias, normalized_text):
-                        best_score = score
-                        best_company = company_name
-                        best_matched_text = alias
+        if self._flat_aliases_stale:
+            self._rebuild_flat_aliases()
+        
+        # Cerca in tutti gli alias di tutte le aziende (nell'ordine di inserimento,
+        # così a parità di punteggio vince il primo alias come nel ciclo per azienda)
+        alias_scores = self._score_aliases(normalized_text)
+        for index in sorted(alias_scores):
+            alias = self._flat_aliases[index]
+            company_name = self._alias_owners[index]
+            
+            # Usa il punteggio massimo
+            score = alias_scores[index]
+            
+            # Bonus per match esatti
+            if normalized_text == alias:
+                score = 100.0
+            elif alias in normalized_text or normalized_text in alias:
+                score = min(score + self.CONTAINMENT_BONUS, 100.0)
+            
+            if score > best_score and score >= self.threshold:
+                # Verifica se il match è valido secondo le regole dell'azienda
+                # normalized_text è già in minuscolo: nessuna nuova conversione
+                if self.config.is_valid_match(company_name, alias, normalized_text,
+                                              full_text_lower=normalized_text):
+                    best_score = score
+                    best_company = company_name
+                    best_matched_text = alias
+                    # Nessun alias successivo può superare un punteggio pieno
+                    if best_score >= 100.0:
+                        break
         
         return best_company, best_score, best_matched_text
     
@@ -223,11 +425,7 @@ class CompanyMatcher:
         word_lower = word.lower().strip()
         
         # Evita forme societarie standalone
-        company_forms = {'spa', 's.p.a', 's.p.a.', 'srl', 's.r.l', 's.r.l.', 
-                        'sas', 's.a.s', 's.a.s.', 'snc', 's.n.c', 's.n.c.',
-                        'ltd', 'inc', 'corp', 'llc', 'gmbh', 'ag', 'sa', 'bv', 'nv'}
-        
-        if word_lower in company_forms:
+        if word_lower in _COMPANY_FORMS:
             return False
         
         # Evita parole troppo generiche (già definite nel normalizer)
@@ -250,15 +448,29 @@ class CompanyMatcher:
         Returns:
             Lista di tuple (nome_azienda, score, testo_matchato)
         """
-        matches = []
+        return self._rank_matches(self._iter_filename_matches(filename))
+    
+    def _iter_filename_matches(self, filename: str) -> Iterator[Tuple[str, float, str]]:
+        """
+        Genera i match di un nome file nell'ordine di priorità, calcolandoli solo
+        quando servono (chi cerca solo il migliore può fermarsi prima).
+        
+        Args:
+            filename: Nome del file
+            
+        Returns:
+            Iteratore di tuple (nome_azienda, score, testo_matchato)
+        """
+        best_score = None
         
         # PRIORITÀ 1: Testa il nome file completo (per catturare frasi complete come "SKY LINE EUROPA")
         company, score, matched_text = self.find_best_match(filename)
         if company and score >= self.threshold:
-            matches.append((company, score, matched_text))
+            yield company, score, matched_text
             # Se troviamo un match completo con score alto, non cercare parti singole
             if score >= 95:
-                return [(company, score, matched_text)]
+                return
+            best_score = score
         
         # PRIORITÀ 2: Testa combinazioni di parole adiacenti (per frasi spezzate da separatori)
         parts = self.normalizer.extract_company_names_from_filename(filename)
@@ -266,21 +478,34 @@ class CompanyMatcher:
             # Testa combinazioni di 2-4 parole adiacenti
             for i in range(len(parts)):
                 for j in range(i + 2, min(i + 5, len(parts) + 1)):  # Da 2 a 4 parole
-                    combined_text = ' '.join(parts[i:j])
-                    company, score, matched_text = self.find_best_match(combined_text)
+                    combined_text = self.normalizer.normalize(' '.join(parts[i:j]))
+                    company, score, matched_text = self.find_best_match_normalized(combined_text)
                     if company and score >= self.threshold:
-                        matches.append((company, score, matched_text))
+                        yield company, score, matched_text
+                        best_score = score if best_score is None else max(best_score, score)
         
         # PRIORITÀ 3: Solo se non abbiamo trovato match di qualità, testa parti singole
-        if not matches or max(match[1] for match in matches) < self.threshold + 5:
+        if best_score is None or best_score < self.threshold + 5:
             for part in parts:
                 # Evita match su parole troppo generiche o forme societarie standalone
                 if self._is_valid_single_word_match(part):
-                    company, score, matched_text = self.find_best_match(part)
+                    company, score, matched_text = self.find_best_match_normalized(
+                        self.normalizer.normalize(part)
+                    )
                     if company and score >= self.threshold:
-                        matches.append((company, score, matched_text))
+                        yield company, score, matched_text
+    
+    @staticmethod
+    def _rank_matches(matches: Iterable[Tuple[str, float, str]]) -> List[Tuple[str, float, str]]:
+        """
+        Rimuove i duplicati (per azienda vale il punteggio più alto) e ordina per score.
         
-        # Rimuovi duplicati e ordina per score
+        Args:
+            matches: Match nell'ordine in cui sono stati trovati
+            
+        Returns:
+            Lista di tuple (nome_azienda, score, testo_matchato) ordinate per score
+        """
         unique_matches = {}
         for company, score, matched_text in matches:
             if company not in unique_matches or score > unique_matches[company][0]:
@@ -292,6 +517,43 @@ class CompanyMatcher:
         
         return result
     
+    def _match_parent_parts(self, parent: str) -> Tuple[Tuple[str, float, str], ...]:
+        """
+        Cerca aziende nelle cartelle di un percorso (in cache per cartella:
+        i file di una stessa cartella condividono lo stesso risultato).
+        
+        Args:
+            parent: Percorso della cartella che contiene il file
+            
+        Returns:
+            Tuple (nome_azienda, score, testo_matchato) con score già penalizzato
+        """
+        key = (parent, self.threshold)
+        cached = self._parent_matches_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Estrai parti dal percorso della cartella
+        path_parts = []
+        for part in Path(parent).parts:
+            path_parts.extend(self.normalizer.extract_company_names_from_filename(part))
+        
+        # Testa ogni parte del percorso
+        path_matches = []
+        for part in path_parts:
+            company, score, matched_text = self.find_best_match(part)
+            if company and score >= self.threshold:
+                # Penalizza i match nel percorso del 10%
+                penalized_score = max(score - 10, 0)
+                if penalized_score >= self.threshold:
+                    path_matches.append((company, penalized_score, matched_text))
+        
+        if len(self._parent_matches_cache) >= self.PARENT_CACHE_SIZE:
+            self._parent_matches_cache.clear()
+        result = tuple(path_matches)
+        self._parent_matches_cache[key] = result
+        return result
+    
     def extract_company_names_from_path(self, file_path: str) -> List[Tuple[str, float, str]]:
         """
         Estrae possibili nomi aziendali da un percorso file, dando priorità al nome del file.
@@ -312,40 +574,64 @@ class CompanyMatcher:
         boosted_filename_matches = []
         for company, score, matched_text in filename_matches:
             # Bonus del 15% per match nel nome del file (max 100%)
-            boosted_score = min(score + 15, 100.0)
+            boosted_score = min(score + self.FILENAME_BONUS, 100.0)
             boosted_filename_matches.append((company, boosted_score, matched_text))
         
         # Seconda priorità: parti del percorso (solo se non abbiamo match nel filename)
         path_matches = []
         if not boosted_filename_matches:
-            # Estrai parti dal percorso completo (escludendo il nome del file)
-            path_parts = []
-            for part in path.parts[:-1]:  # Esclude il nome del file
-                path_parts.extend(self.normalizer.extract_company_names_from_filename(part))
-            
-            # Testa ogni parte del percorso
-            for part in path_parts:
-                company, score, matched_text = self.find_best_match(part)
-                if company and score >= self.threshold:
-                    # Penalizza i match nel percorso del 10%
-                    penalized_score = max(score - 10, 0)
-                    if penalized_score >= self.threshold:
-                        path_matches.append((company, penalized_score, matched_text))
+            path_matches = list(self._match_parent_parts(str(path.parent)))
         
         # Combina i risultati, dando priorità al nome del file
-        all_matches = boosted_filename_matches + path_matches
+        # e rimuovi duplicati mantenendo il punteggio più alto
+        return self._rank_matches(boosted_filename_matches + path_matches)
+    
+    def find_best_company_for_file(self, file_path: str) -> Optional[Tuple[str, float, str]]:
+        """
+        Restituisce solo il miglior match di un file, lo stesso primo elemento di
+        extract_company_names_from_path, fermando la ricerca appena è certo.
         
-        # Rimuovi duplicati mantenendo il punteggio più alto
-        unique_matches = {}
-        for company, score, matched_text in all_matches:
+        Args:
+            file_path: Percorso completo del file
+            
+        Returns:
+            Tupla (nome_azienda, score, testo_matchato) o None se nessun match
+        """
+        path = Path(file_path)
+        
+        best = self._best_match(self._iter_filename_matches(path.name))
+        if best:
+            company, score, matched_text = best
+            return company, min(score + self.FILENAME_BONUS, 100.0), matched_text
+        
+        # Solo se non ci sono match nel nome del file: parti del percorso
+        return self._best_match(self._match_parent_parts(str(path.parent)))
+    
+    @staticmethod
+    def _best_match(matches: Iterable[Tuple[str, float, str]]) -> Optional[Tuple[str, float, str]]:
+        """
+        Restituisce il primo elemento di _rank_matches senza ordinare la lista.
+        
+        Args:
+            matches: Match nell'ordine in cui sono stati trovati
+            
+        Returns:
+            Tupla (nome_azienda, score, testo_matchato) o None se nessun match
+        """
+        unique_matches: Dict[str, Tuple[float, str]] = {}
+        for company, score, matched_text in matches:
             if company not in unique_matches or score > unique_matches[company][0]:
                 unique_matches[company] = (score, matched_text)
+            # La prima azienda trovata vince i pareggi: a 100 nessuno può superarla
+            if score >= 100.0 and next(iter(unique_matches)) == company:
+                break
         
-        result = [(company, score, matched_text) 
-                 for company, (score, matched_text) in unique_matches.items()]
-        result.sort(key=lambda x: x[1], reverse=True)
+        if not unique_matches:
+            return None
         
-        return result
+        # max restituisce il primo massimo, come l'ordinamento stabile di _rank_matches
+        company, (score, matched_text) = max(unique_matches.items(), key=lambda item: item[1][0])
+        return company, score, matched_text
 
 
 class FileScanner:
@@ -384,47 +670,84 @@ class FileScanner:
         
         Args:
             root_path: Percorso della directory root
-            progress_callback: Callback per il progresso (file_corrente, totale_file)
+            progress_callback: Callback per il progresso (file_corrente, totale_file);
+                totale_file è 0 perché non noto durante la scansione
             
         Returns:
             Lista dei percorsi dei file trovati
         """
+        return [entry.path for entry in self.scan_directory_entries(root_path, progress_callback)]
+    
+    def scan_directory_entries(self, root_path: str,
+                               progress_callback: Callable[[int, int], None] = None) -> List[os.DirEntry]:
+        """
+        Come scan_directory, ma restituisce le os.DirEntry dei file trovati:
+        le statistiche lette durante la scansione (es. per il filtro dimensione)
+        restano in cache nella DirEntry e non vanno rilette in fase di analisi.
+        
+        Args:
+            root_path: Percorso della directory root
+            progress_callback: Callback per il progresso (file_corrente, totale_file)
+            
+        Returns:
+            Lista delle DirEntry dei file trovati
+        """
         root = Path(root_path)
         if not root.exists() or not root.is_dir():
             raise ValueError(f"Directory non valida: {root_path}")
         
         files = []
-        total_files = 0
         
-        # Prima passata: conta i file
-        if progress_callback:
-            for _ in root.rglob('*'):
-                if _.is_file():
-                    total_files += 1
+        # Radice dentro una cartella esclusa: nessun file da considerare
+        if self._is_folder_excluded(root):
+            return files
         
-        # Seconda passata: filtra i file
+        # Un'unica visita in profondità con os.scandir: le DirEntry riusano i dati
+        # della directory e le cartelle escluse non vengono nemmeno aperte.
+        # I file di ogni cartella escono consecutivi (prima di scendere nelle
+        # sottocartelle): l'analisi procede già raggruppata per cartella.
+        # Il totale non è noto in anticipo, quindi il progresso riporta totale 0.
         current_file = 0
-        for file_path in root.rglob('*'):
-            if not file_path.is_file():
+        stack = [str(root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    entries = list(entries)
+            except OSError:
                 continue
             
-            current_file += 1
-            if progress_callback:
-                progress_callback(current_file, total_files)
-            
-            # Controlla se la cartella è esclusa
-            if self._is_folder_excluded(file_path):
-                continue
-            
-            # Controlla l'estensione
-            if not self._is_extension_allowed(file_path.name):
-                continue
-            
-            # Controlla la dimensione del file
-            if not self._is_size_allowed(file_path):
-                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Controlla se la cartella è esclusa
+                        if entry.name not in self.exclude_folders:
+                            subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                
+                current_file += 1
+                if progress_callback:
+                    progress_callback(current_file, 0)
+                
+                if entry.name in self.exclude_folders:
+                    continue
+                
+                # Controlla l'estensione
+                if not self._is_extension_allowed(entry.name):
+                    continue
+                
+                # Controlla la dimensione del file
+                if not self._is_size_allowed(entry):
+                    continue
+                
+                files.append(entry)
             
-            files.append(str(file_path))
+            # Sottocartelle nell'ordine di scansione (la pila le estrae dall'ultima)
+            stack.extend(reversed(subdirs))
         
         return files
     
@@ -449,8 +772,8 @@ class FileScanner:
         
         return True
     
-    def _is_size_allowed(self, file_path: Path) -> bool:
-        """Verifica se la dimensione del file è permessa."""
+    def _is_size_allowed(self, file_path) -> bool:
+        """Verifica se la dimensione del file (Path o os.DirEntry) è permessa."""
         if self.max_file_size_mb is None:
             return True
         
@@ -462,9 +785,9 @@ class FileScanner:
     
     def _get_extension(self, filename: str) -> str:
         """Ottiene l'estensione di un file."""
-        if '.' in filename:
-            return '.' + filename.rsplit('.', 1)[1].lower()
-        return ''
+        # rpartition non crea liste intermedie
+        _, sep, extension = filename.rpartition('.')
+        return '.' + extension.lower() if sep else ''
 
 
 class FileOrganizerCore:
@@ -481,6 +804,9 @@ class FileOrganizerCore:
         self.threshold = threshold
         self.dry_run = dry_run
         
+        # Thread per l'analisi dei file (come il default di ThreadPoolExecutor)
+        self.max_workers = min(32, (os.cpu_count() or 1) + 4)
+        
         self.matcher = CompanyMatcher(threshold)
         self.date_extractor = DateExtractor()
         self.file_organizer = FileOrganizer(dry_run)
@@ -497,6 +823,10 @@ class FileOrganizerCore:
         """Aggiunge un'azienda per il matching."""
         self.matcher.add_company(company_name, aliases)
     
+    def build_matcher(self):
+        """Prepara gli indici del matcher dopo aver aggiunto tutte le aziende."""
+        self.matcher.build_index()
+    
     def set_filters(self, include_extensions: Set[str] = None,
                    exclude_extensions: Set[str] = None,
                    exclude_folders: Set[str] = None,
@@ -525,15 +855,15 @@ class FileOrganizerCore:
         Returns:
             Risultato dell'organizzazione
         """
-        print(f"[DEBUG] Avvio organizzazione file:")
-        print(f"[DEBUG] - Directory sorgente: {root_path}")
-        print(f"[DEBUG] - Directory destinazione: {output_path}")
-        print(f"[DEBUG] - Modalità dry run: {self.dry_run}")
-        print(f"[DEBUG] - Soglia matching: {self.threshold}")
+        logger.debug("Avvio organizzazione file:")
+        logger.debug("- Directory sorgente: %s", root_path)
+        logger.debug("- Directory destinazione: %s", output_path)
+        logger.debug("- Modalità dry run: %s", self.dry_run)
+        logger.debug("- Soglia matching: %s", self.threshold)
         if since_date:
-            print(f"[DEBUG] - Data minima: {since_date}")
+            logger.debug("- Data minima: %s", since_date)
         if until_date:
-            print(f"[DEBUG] - Data massima: {until_date}")
+            logger.debug("- Data massima: %s", until_date)
         
         result = OrganizationResult(
             total_files=0,
@@ -547,53 +877,63 @@ class FileOrganizerCore:
         
         try:
             # Fase 1: Scansione dei file
-            print(f"[DEBUG] Fase 1: Scansione directory {root_path}")
+            logger.debug("Fase 1: Scansione directory %s", root_path)
             if progress_callback:
                 progress_callback("Scansione file...", 0, 0)
             
-            files = self.scanner.scan_directory(
+            files = self.scanner.scan_directory_entries(
                 root_path, 
                 lambda c, t: progress_callback("Scansione file...", c, t) if progress_callback else None
             )
             
             result.total_files = len(files)
-            print(f"[DEBUG] Trovati {result.total_files} file da analizzare")
+            logger.debug("Trovati %s file da analizzare", result.total_files)
             
             if not files:
-                print(f"[DEBUG] Nessun file trovato nella directory {root_path}")
+                logger.debug("Nessun file trovato nella directory %s", root_path)
                 return result
             
             # Fase 2: Analisi e matching
-            print(f"[DEBUG] Fase 2: Analisi e matching dei file")
-            print(f"[DEBUG] Aziende configurate: {list(self.matcher.company_aliases.keys())}")
+            logger.debug("Fase 2: Analisi e matching dei file")
+            self.build_matcher()
+            logger.debug("Aziende configurate: %s", self.matcher.company_aliases.keys())
             if progress_callback:
                 progress_callback("Analisi file...", 0, len(files))
             
-            for i, file_path in enumerate(files):
-                if progress_callback:
-                    progress_callback("Analisi file...", i + 1, len(files))
-                
-                print(f"[DEBUG] Analizzando file: {file_path}")
+            # Analisi in parallelo (stat e matching rapidfuzz rilasciano il GIL);
+            # i risultati vengono raccolti in ordine da questo thread
+            def analyze(entry: os.DirEntry):
                 try:
-                    match = self._analyze_file(file_path, since_date, until_date)
-                    if match:
-                        print(f"[DEBUG] Match trovato: {match.company_name} (score: {match.match_score:.1f})")
-                        print(f"[DEBUG] Percorso suggerito: {match.suggested_path}")
+                    return self._analyze_file(entry.path, since_date, until_date, entry), None
+                except Exception as e:
+                    return None, e
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                analyses = executor.map(analyze, files)
+                for i, (entry, (match, error)) in enumerate(zip(files, analyses)):
+                    file_path = entry.path
+                    if progress_callback:
+                        progress_callback("Analisi file...", i + 1, len(files))
+                    
+                    logger.debug("Analizzando file: %s", file_path)
+                    if error is not None:
+                        logger.debug("Errore nell'analisi di %s: %s", file_path, error)
+                        result.errors.append(f"Errore nell'analisi di {file_path}: {error}")
+                        result.skipped_files += 1
+                    elif match:
+                        logger.debug("Match trovato: %s (score: %.1f)", match.company_name, match.match_score)
+                        logger.debug("Percorso suggerito: %s", match.suggested_path)
                         result.matches.append(match)
                     else:
-                        print(f"[DEBUG] Nessun match trovato per: {os.path.basename(file_path)}")
+                        logger.debug("Nessun match trovato per: %s", os.path.basename(file_path))
                         result.skipped_files += 1
-                except Exception as e:
-                    print(f"[DEBUG] Errore nell'analisi di {file_path}: {e}")
-                    result.errors.append(f"Errore nell'analisi di {file_path}: {e}")
-                    result.skipped_files += 1
             
             result.processed_files = len(result.matches)
-            print(f"[DEBUG] File con match trovati: {result.processed_files}")
+            logger.debug("File con match trovati: %s", result.processed_files)
             
             # Fase 3: Organizzazione (solo se non è dry run o se esplicitamente richiesto)
             if not self.dry_run:
-                print(f"[DEBUG] Fase 3: Spostamento file nella directory {output_path}")
+                logger.debug("Fase 3: Spostamento file nella directory %s", output_path)
                 if progress_callback:
                     progress_callback("Organizzazione file...", 0, len(result.matches))
                 
@@ -601,22 +941,22 @@ class FileOrganizerCore:
                     if progress_callback:
                         progress_callback("Organizzazione file...", i + 1, len(result.matches))
                     
-                    print(f"[DEBUG] Spostando file: {match.file_path}")
-                    print(f"[DEBUG] Destinazione: {output_path}")
+                    logger.debug("Spostando file: %s", match.file_path)
+                    logger.debug("Destinazione: %s", output_path)
                     try:
                         success = self._move_file(match, output_path)
                         if success:
-                            print(f"[DEBUG] File spostato con successo")
+                            logger.debug("File spostato con successo")
                             result.successful_moves += 1
                         else:
-                            print(f"[DEBUG] Spostamento fallito")
+                            logger.debug("Spostamento fallito")
                             result.failed_moves += 1
                     except Exception as e:
-                        print(f"[DEBUG] Errore nello spostamento: {e}")
+                        logger.debug("Errore nello spostamento: %s", e)
                         result.errors.append(f"Errore nello spostamento di {match.file_path}: {e}")
                         result.failed_moves += 1
             else:
-                print(f"[DEBUG] Modalità dry run attiva - nessun file verrà spostato")
+                logger.debug("Modalità dry run attiva - nessun file verrà spostato")
             
         except Exception as e:
             result.errors.append(f"Errore generale: {e}")
@@ -624,7 +964,7 @@ class FileOrganizerCore:
         return result
     
     def _analyze_file(self, file_path: str, since_date: date = None, 
-                     until_date: date = None) -> Optional[FileMatch]:
+                     until_date: date = None, entry: os.DirEntry = None) -> Optional[FileMatch]:
         """
         Analizza un file per determinare l'azienda e la categoria.
         
@@ -632,6 +972,7 @@ class FileOrganizerCore:
             file_path: Percorso del file
             since_date: Data minima
             until_date: Data massima
+            entry: DirEntry della scansione (riusa le statistiche già lette)
             
         Returns:
             FileMatch se trovato un match, None altrimenti
@@ -639,10 +980,14 @@ class FileOrganizerCore:
         path = Path(file_path)
         filename = path.name
         
+        # Statistiche del file, lette al più una volta e solo se servono
+        file_stat = None
+        
         # Estrai la data dal file
         file_date = self.date_extractor.extract_date_from_filename(filename)
         if not file_date:
-            file_date = self.date_extractor.extract_date_from_file_stats(file_path)
+            file_stat = self._stat_file(file_path, entry)
+            file_date = self.date_extractor.extract_date_from_file_stats(file_path, file_stat)
         
         # Filtra per date se specificate
         if file_date:
@@ -651,13 +996,12 @@ class FileOrganizerCore:
             if until_date and file_date > until_date:
                 return None
         
-        # Trova il match aziendale usando il nuovo metodo che dà priorità al nome del file
-        matches = self.matcher.extract_company_names_from_path(file_path)
-        if not matches:
+        # Trova il miglior match aziendale, dando priorità al nome del file
+        best_match = self.matcher.find_best_company_for_file(file_path)
+        if not best_match:
             return None
         
-        # Prendi il miglior match
-        company_name, score, matched_text = matches[0]
+        company_name, score, matched_text = best_match
         
         # Determina la categoria del file
         category = get_file_category(filename)
@@ -669,10 +1013,9 @@ class FileOrganizerCore:
         )
         
         # Ottieni la dimensione del file
-        try:
-            file_size = path.stat().st_size
-        except OSError:
-            file_size = 0
+        if file_stat is None:
+            file_stat = self._stat_file(file_path, entry)
+        file_size = file_stat.st_size if file_stat is not None else 0
         
         return FileMatch(
             file_path=file_path,
@@ -685,6 +1028,22 @@ class FileOrganizerCore:
             file_size=file_size
         )
     
+    def _stat_file(self, file_path: str, entry: os.DirEntry = None) -> Optional[os.stat_result]:
+        """
+        Legge le statistiche di un file, dalla cache della DirEntry se disponibile.
+        
+        Args:
+            file_path: Percorso del file
+            entry: DirEntry della scansione (opzionale)
+            
+        Returns:
+            Statistiche del file o None se non leggibili
+        """
+        try:
+            return entry.stat() if entry is not None else os.stat(file_path)
+        except OSError:
+            return None
+    
     def _generate_suggested_path(self, company_name: str, category: FileCategory,
                                year: str, filename: str, file_date: date = None) -> str:
         """
@@ -727,28 +1086,28 @@ class FileOrganizerCore:
         """
         # Crea la struttura di directory
         year = str(match.file_date.year) if match.file_date else str(datetime.now().year)
-        print(f"[DEBUG] Creando struttura directory:")
-        print(f"[DEBUG] - Base path: {output_path}")
-        print(f"[DEBUG] - Azienda: {match.company_name}")
-        print(f"[DEBUG] - Categoria: {match.category.value}")
-        print(f"[DEBUG] - Anno: {year}")
+        logger.debug("Creando struttura directory:")
+        logger.debug("- Base path: %s", output_path)
+        logger.debug("- Azienda: %s", match.company_name)
+        logger.debug("- Categoria: %s", match.category.value)
+        logger.debug("- Anno: %s", year)
         
         dest_dir = self.file_organizer.create_directory_structure(
             output_path, match.company_name, year, match.category.value
         )
         
-        print(f"[DEBUG] Directory di destinazione creata: {dest_dir}")
+        logger.debug("Directory di destinazione creata: %s", dest_dir)
         
         # Sposta il file
-        print(f"[DEBUG] Spostando file da {match.file_path} a {dest_dir}")
+        logger.debug("Spostando file da %s a %s", match.file_path, dest_dir)
         success, final_path, error = self.file_organizer.move_file(
             match.file_path, dest_dir
         )
         
         if success:
-            print(f"[DEBUG] File spostato con successo in: {final_path}")
+            logger.debug("File spostato con successo in: %s", final_path)
         else:
-            print(f"[DEBUG] Errore nello spostamento: {error}")
+            logger.debug("Errore nello spostamento: %s", error)
         
         if not success and error:
             raise Exception(error)
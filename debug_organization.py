@@ -3,11 +3,20 @@
 Script di debug per testare l'organizzazione dei file
 """
 
+import logging
 import os
 import sys
 from pathlib import Path
 from core import FileOrganizerCore
 
+logger = logging.getLogger(__name__)
+
+# Aziende di prova con i rispettivi alias
+DEBUG_COMPANIES = {
+    "ACME Corp": ["ACME", "Acme Corporation"],
+    "Microsoft": ["Microsoft Corp", "MS"],
+}
+
 def test_organization():
     """Test dell'organizzazione dei file"""
     
@@ -18,22 +27,29 @@ def test_organization():
     # Crea l'organizzatore
     organizer = FileOrganizerCore(threshold=70.0, dry_run=False)
     
-    # Aggiungi alcune aziende
-    organizer.add_company("ACME Corp", ["ACME", "Acme Corporation"])
-    organizer.add_company("Microsoft", ["Microsoft Corp", "MS"])
+    # Aggiungi alcune aziende (add_company normalizza gli alias una volta sola)
+    for company_name, aliases in DEBUG_COMPANIES.items():
+        organizer.add_company(company_name, aliases)
+    organizer.build_matcher()
     
-    print(f"Directory di test: {test_dir.absolute()}")
-    print(f"Directory di output: {output_dir.absolute()}")
+    # Percorsi assoluti calcolati una sola volta
+    test_abs = str(test_dir.resolve())
+    output_abs = str(output_dir.resolve())
+    
+    print(f"Directory di test: {test_abs}")
+    print(f"Directory di output: {output_abs}")
     
     # Verifica che i file di test esistano
     if not test_dir.exists():
         print(f"ERRORE: Directory di test {test_dir} non trovata!")
         return
     
-    files = list(test_dir.glob("*"))
+    # Un'unica lettura della directory: bastano i nomi delle DirEntry
+    with os.scandir(test_dir) as entries:
+        files = [entry.name for entry in entries]
     print(f"File trovati nella directory di test: {len(files)}")
-    for file in files:
-        print(f"  - {file.name}")
+    for name in files:
+        print(f"  - {name}")
     
     if not files:
         print("ERRORE: Nessun file trovato nella directory di test!")
@@ -42,13 +58,29 @@ def test_organization():
     # Esegui l'organizzazione
     print("\n--- Avvio organizzazione ---")
     
+    # Al più ~100 aggiornamenti per fase, riscritti sulla stessa riga
+    last_phase = None
+    last_current = 0
+    
     def progress_callback(phase, current, total):
-        print(f"{phase}: {current}/{total}")
+        nonlocal last_phase, last_current
+        if phase != last_phase:
+            if last_phase is not None:
+                sys.stdout.write("\n")
+            last_phase, last_current = phase, current
+        elif current != total:
+            # Totale sconosciuto (0) durante la scansione: un aggiornamento ogni 100 file
+            step = max(1, total // 100) if total else 100
+            if current - last_current < step:
+                return
+            last_current = current
+        sys.stdout.write(f"\r{phase}: {current}/{total}")
+        sys.stdout.flush()
     
     try:
         result = organizer.organize_files(
-            str(test_dir.absolute()),
-            str(output_dir.absolute()),
+            test_abs,
+            output_abs,
             progress_callback=progress_callback
         )
         
@@ -66,30 +98,51 @@ def test_organization():
                 print(f"  - {error}")
         
         print(f"\nMatch trovati: {len(result.matches)}")
-        for match in result.matches:
-            print(f"  - {match.file_path}")
-            print(f"    Azienda: {match.company_name}")
-            print(f"    Score: {match.match_score}")
-            print(f"    Testo matchato: {match.matched_text}")
-            print(f"    Categoria: {match.category}")
-            print(f"    Percorso suggerito: {match.suggested_path}")
-            print()
+        # Un'unica scrittura per tutti i match
+        sys.stdout.write("".join(
+            f"  - {match.file_path}\n"
+            f"    Azienda: {match.company_name}\n"
+            f"    Score: {match.match_score}\n"
+            f"    Testo matchato: {match.matched_text}\n"
+            f"    Categoria: {match.category.value}\n"
+            f"    Percorso suggerito: {match.suggested_path}\n"
+            f"\n"
+            for match in result.matches
+        ))
         
         # Verifica la struttura di output
         if output_dir.exists():
             print("--- Struttura di output ---")
-            for root, dirs, files in os.walk(output_dir):
-                level = root.replace(str(output_dir), '').count(os.sep)
-                indent = ' ' * 2 * level
-                print(f"{indent}{os.path.basename(root)}/")
-                subindent = ' ' * 2 * (level + 1)
-                for file in files:
-                    print(f"{subindent}{file}")
+            # Visita iterativa con os.scandir: il tipo delle voci arriva dalla
+            # lettura della directory e il livello viaggia con la pila.
+            # Come os.walk, le cartelle illeggibili o sparite vengono saltate
+            stack = [(output_abs, 0)]
+            while stack:
+                root, level = stack.pop()
+                try:
+                    with os.scandir(root) as entries:
+                        entries = sorted(entries, key=lambda entry: entry.name)
+                except OSError:
+                    continue
+                print(f"{'  ' * level}{os.path.basename(root)}/")
+                subindent = '  ' * (level + 1)
+                subdirs = []
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        subdirs.append((entry.path, level + 1))
+                    else:
+                        print(f"{subindent}{entry.name}")
+                # Sottocartelle in ordine alfabetico (la pila le estrae dall'ultima)
+                stack.extend(reversed(subdirs))
         
     except Exception as e:
-        print(f"ERRORE durante l'organizzazione: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERRORE durante l'organizzazione: %s", e)
 
 if __name__ == "__main__":
+    # Mostra la traccia dettagliata dell'organizzazione (logger.debug in core)
+    logging.basicConfig(level=logging.DEBUG, format="[%(levelname)s] %(message)s")
     test_organization()
\ No newline at end of file
@@ -3,12 +3,19 @@ Modulo per la classificazione dei tipi di file.
 Gestisce la mappatura delle estensioni ai tipi di file per l'organizzazione.
 """
 
-from typing import Dict, List, Set
+import os
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Set
 from enum import Enum
 
 
-class FileCategory(Enum):
-    """Categorie di file supportate."""
+class FileCategory(str, Enum):
+    """
+    Categorie di file supportate.
+    
+    Derivando da str ogni membro è anche la sua stringa: hash e confronti
+    usano quelli (in C) di str invece dei metodi Python di Enum.
+    """
     PDF = "PDF"
     WORD = "Word"
     EXCEL = "Excel"
@@ -21,157 +28,193 @@ class FileCategory(Enum):
     ALTRO = "Altro"
 
 
+# Un bit per categoria, per combinare più categorie in un'unica maschera intera
+_CATEGORY_FLAGS = MappingProxyType({
+    category: 1 << position for position, category in enumerate(FileCategory)
+})
+
+
+# Mappatura predefinita estensione -> categoria (costruita una sola volta all'import)
+_EXTENSION_MAP = MappingProxyType({
+    # PDF
+    '.pdf': FileCategory.PDF,
+    
+    # Microsoft Word
+    '.doc': FileCategory.WORD,
+    '.docx': FileCategory.WORD,
+    '.docm': FileCategory.WORD,
+    '.dot': FileCategory.WORD,
+    '.dotx': FileCategory.WORD,
+    '.dotm': FileCategory.WORD,
+    '.odt': FileCategory.WORD,
+    '.rtf': FileCategory.WORD,
+    
+    # Microsoft Excel
+    '.xls': FileCategory.EXCEL,
+    '.xlsx': FileCategory.EXCEL,
+    '.xlsm': FileCategory.EXCEL,
+    '.xlsb': FileCategory.EXCEL,
+    '.xlt': FileCategory.EXCEL,
+    '.xltx': FileCategory.EXCEL,
+    '.xltm': FileCategory.EXCEL,
+    '.xlam': FileCategory.EXCEL,
+    '.ods': FileCategory.EXCEL,
+    '.csv': FileCategory.EXCEL,
+    
+    # Microsoft PowerPoint
+    '.ppt': FileCategory.POWERPOINT,
+    '.pptx': FileCategory.POWERPOINT,
+    '.pptm': FileCategory.POWERPOINT,
+    '.pot': FileCategory.POWERPOINT,
+    '.potx': FileCategory.POWERPOINT,
+    '.potm': FileCategory.POWERPOINT,
+    '.pps': FileCategory.POWERPOINT,
+    '.ppsx': FileCategory.POWERPOINT,
+    '.ppsm': FileCategory.POWERPOINT,
+    '.odp': FileCategory.POWERPOINT,
+    
+    # Immagini
+    '.jpg': FileCategory.IMMAGINI,
+    '.jpeg': FileCategory.IMMAGINI,
+    '.png': FileCategory.IMMAGINI,
+    '.gif': FileCategory.IMMAGINI,
+    '.bmp': FileCategory.IMMAGINI,
+    '.tiff': FileCategory.IMMAGINI,
+    '.tif': FileCategory.IMMAGINI,
+    '.svg': FileCategory.IMMAGINI,
+    '.webp': FileCategory.IMMAGINI,
+    '.ico': FileCategory.IMMAGINI,
+    '.raw': FileCategory.IMMAGINI,
+    '.cr2': FileCategory.IMMAGINI,
+    '.nef': FileCategory.IMMAGINI,
+    '.arw': FileCategory.IMMAGINI,
+    '.dng': FileCategory.IMMAGINI,
+    '.psd': FileCategory.IMMAGINI,
+    '.ai': FileCategory.IMMAGINI,
+    '.eps': FileCategory.IMMAGINI,
+    
+    # Video
+    '.mp4': FileCategory.VIDEO,
+    '.avi': FileCategory.VIDEO,
+    '.mkv': FileCategory.VIDEO,
+    '.mov': FileCategory.VIDEO,
+    '.wmv': FileCategory.VIDEO,
+    '.flv': FileCategory.VIDEO,
+    '.webm': FileCategory.VIDEO,
+    '.m4v': FileCategory.VIDEO,
+    '.3gp': FileCategory.VIDEO,
+    '.mpg': FileCategory.VIDEO,
+    '.mpeg': FileCategory.VIDEO,
+    '.ts': FileCategory.VIDEO,
+    '.vob': FileCategory.VIDEO,
+    
+    # Audio
+    '.mp3': FileCategory.AUDIO,
+    '.wav': FileCategory.AUDIO,
+    '.flac': FileCategory.AUDIO,
+    '.aac': FileCategory.AUDIO,
+    '.ogg': FileCategory.AUDIO,
+    '.wma': FileCategory.AUDIO,
+    '.m4a': FileCategory.AUDIO,
+    '.opus': FileCategory.AUDIO,
+    '.aiff': FileCategory.AUDIO,
+    '.au': FileCategory.AUDIO,
+    
+    # Archivi
+    '.zip': FileCategory.ARCHIVI,
+    '.rar': FileCategory.ARCHIVI,
+    '.7z': FileCategory.ARCHIVI,
+    '.tar': FileCategory.ARCHIVI,
+    '.gz': FileCategory.ARCHIVI,
+    '.bz2': FileCategory.ARCHIVI,
+    '.xz': FileCategory.ARCHIVI,
+    '.tar.gz': FileCategory.ARCHIVI,
+    '.tar.bz2': FileCategory.ARCHIVI,
+    '.tar.xz': FileCategory.ARCHIVI,
+    '.iso': FileCategory.ARCHIVI,
+    '.dmg': FileCategory.ARCHIVI,
+    
+    # Codice e sviluppo
+    '.py': FileCategory.CODICE,
+    '.js': FileCategory.CODICE,
+    '.html': FileCategory.CODICE,
+    '.htm': FileCategory.CODICE,
+    '.css': FileCategory.CODICE,
+    '.php': FileCategory.CODICE,
+    '.java': FileCategory.CODICE,
+    '.cpp': FileCategory.CODICE,
+    '.c': FileCategory.CODICE,
+    '.h': FileCategory.CODICE,
+    '.cs': FileCategory.CODICE,
+    '.vb': FileCategory.CODICE,
+    '.rb': FileCategory.CODICE,
+    '.go': FileCategory.CODICE,
+    '.rs': FileCategory.CODICE,
+    '.swift': FileCategory.CODICE,
+    '.kt': FileCategory.CODICE,
+    '.scala': FileCategory.CODICE,
+    '.r': FileCategory.CODICE,
+    '.sql': FileCategory.CODICE,
+    '.xml': FileCategory.CODICE,
+    '.json': FileCategory.CODICE,
+    '.yaml': FileCategory.CODICE,
+    '.yml': FileCategory.CODICE,
+    '.toml': FileCategory.CODICE,
+    '.ini': FileCategory.CODICE,
+    '.cfg': FileCategory.CODICE,
+    '.conf': FileCategory.CODICE,
+    '.sh': FileCategory.CODICE,
+    '.bat': FileCategory.CODICE,
+    '.ps1': FileCategory.CODICE,
+    '.md': FileCategory.CODICE,
+    '.txt': FileCategory.CODICE,
+})
+
+# Nomi file di build/codice noti senza estensione (in minuscolo); gli altri restano ALTRO
+_FULLNAME_MAP = MappingProxyType({
+    'dockerfile': FileCategory.CODICE,
+    'containerfile': FileCategory.CODICE,
+    'makefile': FileCategory.CODICE,
+    'gnumakefile': FileCategory.CODICE,
+    'jenkinsfile': FileCategory.CODICE,
+    'vagrantfile': FileCategory.CODICE,
+    'gemfile': FileCategory.CODICE,
+    'rakefile': FileCategory.CODICE,
+    'procfile': FileCategory.CODICE,
+})
+
+# Estensioni predefinite per categoria (per ricerca rapida)
+_CATEGORY_EXTENSIONS = MappingProxyType({
+    category: frozenset(ext for ext, cat in _EXTENSION_MAP.items() if cat is category)
+    for category in FileCategory
+})
+
+
 class FileTypeMapper:
     """Classe per mappare le estensioni ai tipi di file."""
     
+    # Numero massimo di suffissi con categoria in cache
+    CATEGORY_CACHE_SIZE = 1024
+    
     def __init__(self):
         """Inizializza il mapper con le estensioni predefinite."""
-        self._extension_map = {
-            # PDF
-            '.pdf': FileCategory.PDF,
-            
-            # Microsoft Word
-            '.doc': FileCategory.WORD,
-            '.docx': FileCategory.WORD,
-            '.docm': FileCategory.WORD,
-            '.dot': FileCategory.WORD,
-            '.dotx': FileCategory.WORD,
-            '.dotm': FileCategory.WORD,
-            '.odt': FileCategory.WORD,
-            '.rtf': FileCategory.WORD,
-            
-            # Microsoft Excel
-            '.xls': FileCategory.EXCEL,
-            '.xlsx': FileCategory.EXCEL,
-            '.xlsm': FileCategory.EXCEL,
-            '.xlsb': FileCategory.EXCEL,
-            '.xlt': FileCategory.EXCEL,
-            '.xltx': FileCategory.EXCEL,
-            '.xltm': FileCategory.EXCEL,
-            '.xlam': FileCategory.EXCEL,
-            '.ods': FileCategory.EXCEL,
-            '.csv': FileCategory.EXCEL,
-            
-            # Microsoft PowerPoint
-            '.ppt': FileCategory.POWERPOINT,
-            '.pptx': FileCategory.POWERPOINT,
-            '.pptm': FileCategory.POWERPOINT,
-            '.pot': FileCategory.POWERPOINT,
-            '.potx': FileCategory.POWERPOINT,
-            '.potm': FileCategory.POWERPOINT,
-            '.pps': FileCategory.POWERPOINT,
-            '.ppsx': FileCategory.POWERPOINT,
-            '.ppsm': FileCategory.POWERPOINT,
-            '.odp': FileCategory.POWERPOINT,
-            
-            # Immagini
-            '.jpg': FileCategory.IMMAGINI,
-            '.jpeg': FileCategory.IMMAGINI,
-            '.png': FileCategory.IMMAGINI,
-            '.gif': FileCategory.IMMAGINI,
-            '.bmp': FileCategory.IMMAGINI,
-            '.tiff': FileCategory.IMMAGINI,
-            '.tif': FileCategory.IMMAGINI,
-            '.svg': FileCategory.IMMAGINI,
-            '.webp': FileCategory.IMMAGINI,
-            '.ico': FileCategory.IMMAGINI,
-            '.raw': FileCategory.IMMAGINI,
-            '.cr2': FileCategory.IMMAGINI,
-            '.nef': FileCategory.IMMAGINI,
-            '.arw': FileCategory.IMMAGINI,
-            '.dng': FileCategory.IMMAGINI,
-            '.psd': FileCategory.IMMAGINI,
-            '.ai': FileCategory.IMMAGINI,
-            '.eps': FileCategory.IMMAGINI,
-            
-            # Video
-            '.mp4': FileCategory.VIDEO,
-            '.avi': FileCategory.VIDEO,
-            '.mkv': FileCategory.VIDEO,
-            '.mov': FileCategory.VIDEO,
-            '.wmv': FileCategory.VIDEO,
-            '.flv': FileCategory.VIDEO,
-            '.webm': FileCategory.VIDEO,
-            '.m4v': FileCategory.VIDEO,
-            '.3gp': FileCategory.VIDEO,
-            '.mpg': FileCategory.VIDEO,
-            '.mpeg': FileCategory.VIDEO,
-            '.ts': FileCategory.VIDEO,
-            '.vob': FileCategory.VIDEO,
-            
-            # Audio
-            '.mp3': FileCategory.AUDIO,
-            '.wav': FileCategory.AUDIO,
-            '.flac': FileCategory.AUDIO,
-            '.aac': FileCategory.AUDIO,
-            '.ogg': FileCategory.AUDIO,
-            '.wma': FileCategory.AUDIO,
-            '.m4a': FileCategory.AUDIO,
-            '.opus': FileCategory.AUDIO,
-            '.aiff': FileCategory.AUDIO,
-            '.au': FileCategory.AUDIO,
-            
-            # Archivi
-            '.zip': FileCategory.ARCHIVI,
-            '.rar': FileCategory.ARCHIVI,
-            '.7z': FileCategory.ARCHIVI,
-            '.tar': FileCategory.ARCHIVI,
-            '.gz': FileCategory.ARCHIVI,
-            '.bz2': FileCategory.ARCHIVI,
-            '.xz': FileCategory.ARCHIVI,
-            '.tar.gz': FileCategory.ARCHIVI,
-            '.tar.bz2': FileCategory.ARCHIVI,
-            '.tar.xz': FileCategory.ARCHIVI,
-            '.iso': FileCategory.ARCHIVI,
-            '.dmg': FileCategory.ARCHIVI,
-            
-            # Codice e sviluppo
-            '.py': FileCategory.CODICE,
-            '.js': FileCategory.CODICE,
-            '.html': FileCategory.CODICE,
-            '.htm': FileCategory.CODICE,
-            '.css': FileCategory.CODICE,
-            '.php': FileCategory.CODICE,
-            '.java': FileCategory.CODICE,
-            '.cpp': FileCategory.CODICE,
-            '.c': FileCategory.CODICE,
-            '.h': FileCategory.CODICE,
-            '.cs': FileCategory.CODICE,
-            '.vb': FileCategory.CODICE,
-            '.rb': FileCategory.CODICE,
-            '.go': FileCategory.CODICE,
-            '.rs': FileCategory.CODICE,
-            '.swift': FileCategory.CODICE,
-            '.kt': FileCategory.CODICE,
-            '.scala': FileCategory.CODICE,
-            '.r': FileCategory.CODICE,
-            '.sql': FileCategory.CODICE,
-            '.xml': FileCategory.CODICE,
-            '.json': FileCategory.CODICE,
-            '.yaml': FileCategory.CODICE,
-            '.yml': FileCategory.CODICE,
-            '.toml': FileCategory.CODICE,
-            '.ini': FileCategory.CODICE,
-            '.cfg': FileCategory.CODICE,
-            '.conf': FileCategory.CODICE,
-            '.sh': FileCategory.CODICE,
-            '.bat': FileCategory.CODICE,
-            '.ps1': FileCategory.CODICE,
-            '.md': FileCategory.CODICE,
-            '.txt': FileCategory.CODICE,
-        }
+        # Copie modificabili delle mappe predefinite (copia in C, senza ricostruirle)
+        self._extension_map = dict(_EXTENSION_MAP)
+        # I frozenset sono condivisi: le modifiche sostituiscono l'insieme della categoria
+        self._category_extensions = dict(_CATEGORY_EXTENSIONS)
         
-        # Set di estensioni per categoria (per ricerca rapida)
-        self._category_extensions = {}
-        for category in FileCategory:
-            self._category_extensions[category] = set()
+        # Estensioni composte: ultima estensione -> estensioni che la possono precedere
+        # (es. '.gz' -> {'.tar'}), ricavate dalla mappa
+        self._composite_prefixes: Dict[str, FrozenSet[str]] = {}
+        self._rebuild_composite_prefixes()
         
-        for ext, category in self._extension_map.items():
-            self._category_extensions[category].add(ext)
+        # Categoria per suffisso così come compare nei nomi file (es. 'pdf', 'PDF')
+        self._category_cache: Dict[str, FileCategory] = {}
     
     def get_file_category(self, filename: str) -> FileCategory:
         """
-        Determina la categoria di un file basandosi sulla sua estensione.
+        Determina la categoria di un file basandosi sulla sua estensione
+        (o sul nome, per alcuni file noti senza estensione come Makefile).
         
         Args:
             filename: Nome del file (con estensione)
@@ -179,11 +222,72 @@ class FileTypeMapper:
         Returns:
             Categoria del file
         """
+        # Le estensioni si ripetono su molti file: riusa la categoria già trovata
+        _, sep, suffix = filename.rpartition('.')
+        if not sep:
+            # Senza estensione: alcuni nomi noti (Makefile, Dockerfile, ...) sono riconoscibili
+            return _FULLNAME_MAP.get(os.path.basename(filename).lower(), FileCategory.ALTRO)
+        
+        category = self._category_cache.get(suffix)
+        if category is not None:
+            return category
+        
         # Estrai l'estensione
         extension = self._extract_extension(filename)
         
         # Cerca nella mappa
-        return self._extension_map.get(extension, FileCategory.ALTRO)
+        category = self._extension_map.get(extension, FileCategory.ALTRO)
+        
+        # Le estensioni finali di una composta dipendono anche dal resto del nome (.tar.gz)
+        if extension not in self._composite_prefixes:
+            if len(self._category_cache) >= self.CATEGORY_CACHE_SIZE:
+                self._category_cache.clear()
+            self._category_cache[suffix] = category
+        
+        return category
+    
+    def classify_many(self, filenames: List[str]) -> List[FileCategory]:
+        """
+        Determina la categoria di molti file in un'unica chiamata.
+        Per un singolo file usare get_file_category.
+        
+        Args:
+            filenames: Lista di nomi file
+            
+        Returns:
+            Lista delle categorie, nello stesso ordine dei nomi
+        """
+        get_category = self.get_file_category
+        return [get_category(filename) for filename in filenames]
+    
+    @staticmethod
+    def category_mask(*categories: FileCategory) -> int:
+        """
+        Combina più categorie in una maschera di bit (es. tutti i documenti).
+        
+        Args:
+            *categories: Categorie da includere
+            
+        Returns:
+            Maschera da passare a is_any
+        """
+        mask = 0
+        for category in categories:
+            mask |= _CATEGORY_FLAGS[category]
+        return mask
+    
+    def is_any(self, filename: str, mask: int) -> bool:
+        """
+        Verifica se un file appartiene a una delle categorie della maschera.
+        
+        Args:
+            filename: Nome del file
+            mask: Maschera ottenuta da category_mask
+            
+        Returns:
+            True se la categoria del file è nella maschera
+        """
+        return bool(_CATEGORY_FLAGS[self.get_file_category(filename)] & mask)
     
     def _extract_extension(self, filename: str) -> str:
         """
@@ -195,22 +299,33 @@ class FileTypeMapper:
         Returns:
             Estensione in lowercase (con il punto)
         """
-        # Gestisci estensioni composte come .tar.gz
-        filename_lower = filename.lower()
+        # Estensione normale: una sola slice dall'ultimo punto, convertita in lowercase
+        dot = filename.rfind('.')
+        if dot == -1:
+            return ''
+        extension = filename[dot:].lower()
         
-        # Controlla estensioni composte comuni
-        composite_extensions = ['.tar.gz', '.tar.bz2', '.tar.xz']
-        for comp_ext in composite_extensions:
-            if filename_lower.endswith(comp_ext):
-                return comp_ext
+        # Gestisci estensioni composte come .tar.gz (solo se l'ultima estensione ne chiude una)
+        prefixes = self._composite_prefixes.get(extension)
+        if prefixes:
+            previous_dot = filename.rfind('.', 0, dot)
+            if previous_dot != -1 and filename[previous_dot:dot].lower() in prefixes:
+                return filename[previous_dot:].lower()
         
-        # Estensione normale
-        if '.' in filename:
-            return '.' + filename.rsplit('.', 1)[1].lower()
-        
-        return ''
+        return extension
     
-    def get_extensions_for_category(self, category: FileCategory) -> Set[str]:
+    def _rebuild_composite_prefixes(self):
+        """Ricostruisce l'indice delle estensioni composte (es. .tar.gz) dalla mappa."""
+        composite_prefixes: Dict[str, Set[str]] = {}
+        for extension in self._extension_map:
+            if extension.count('.') == 2 and extension.startswith('.'):
+                dot = extension.rfind('.')
+                composite_prefixes.setdefault(extension[dot:], set()).add(extension[:dot])
+        self._composite_prefixes = {
+            last: frozenset(prefixes) for last, prefixes in composite_prefixes.items()
+        }
+    
+    def get_extensions_for_category(self, category: FileCategory) -> FrozenSet[str]:
         """
         Ottiene tutte le estensioni per una categoria.
         
@@ -218,9 +333,9 @@ class FileTypeMapper:
             category: Categoria di file
             
         Returns:
-            Set di estensioni per la categoria
+            Insieme (immutabile) di estensioni per la categoria
         """
-        return self._category_extensions.get(category, set()).copy()
+        return self._category_extensions.get(category, frozenset())
     
     def add_extension_mapping(self, extension: str, category: FileCategory):
         """
@@ -235,7 +350,9 @@ class FileTypeMapper:
             extension = '.' + extension
         
         self._extension_map[extension] = category
-        self._category_extensions[category].add(extension)
+        self._category_extensions[category] = self._category_extensions[category] | {extension}
+        self._rebuild_composite_prefixes()
+        self._category_cache.clear()
     
     def remove_extension_mapping(self, extension: str):
         """
@@ -251,7 +368,9 @@ class FileTypeMapper:
         if extension in self._extension_map:
             category = self._extension_map[extension]
             del self._extension_map[extension]
-            self._category_extensions[category].discard(extension)
+            self._category_extensions[category] = self._category_extensions[category] - {extension}
+            self._rebuild_composite_prefixes()
+            self._category_cache.clear()
     
     def get_all_extensions(self) -> Set[str]:
         """
@@ -288,31 +407,17 @@ class FileTypeMapper:
         Returns:
             Lista filtrata di nomi file
         """
-        filtered = []
-        
-        # Normalizza le estensioni
-        if include_extensions:
-            include_extensions = {ext.lower() if ext.startswith('.') else '.' + ext.lower() 
-                                for ext in include_extensions}
-        
-        if exclude_extensions:
-            exclude_extensions = {ext.lower() if ext.startswith('.') else '.' + ext.lower() 
-                                for ext in exclude_extensions}
-        
-        for filename in filenames:
-            extension = self._extract_extension(filename)
-            
-            # Controlla esclusioni
-            if exclude_extensions and extension in exclude_extensions:
-                continue
-            
-            # Controlla inclusioni
-            if include_extensions and extension not in include_extensions:
-                continue
-            
-            filtered.append(filename)
+        # Normalizza le estensioni una sola volta (None = nessuna inclusione richiesta)
+        include = frozenset(ext.lower() if ext.startswith('.') else '.' + ext.lower() 
+                            for ext in include_extensions) if include_extensions else None
+        exclude = frozenset(ext.lower() if ext.startswith('.') else '.' + ext.lower() 
+                            for ext in exclude_extensions or ())
         
-        return filtered
+        # Esclusioni prima delle inclusioni, in un'unica passata
+        extract = self._extract_extension
+        return [filename for filename in filenames
+                if (extension := extract(filename)) not in exclude
+                and (include is None or extension in include)]
 
 
 # Istanza globale del mapper
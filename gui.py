@@ -5,35 +5,70 @@ Utilizza PyQt6 con tema scuro/chiaro, drag&drop e operazioni asincrone.
 
 import sys
 import os
-import json
+import stat
 from datetime import datetime, date
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set
-import threading
-import traceback
+from typing import List, Optional, Tuple
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QPushButton, QLabel, QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem,
     QProgressBar, QSlider, QCheckBox, QComboBox, QDateEdit, QFileDialog,
-    QMessageBox, QTabWidget, QGroupBox, QSplitter, QHeaderView, QFrame,
-    QScrollArea, QListWidget, QListWidgetItem, QDialog, QDialogButtonBox,
-    QSpinBox, QDoubleSpinBox
+    QMessageBox, QTabWidget, QGroupBox, QSplitter, QHeaderView,
+    QScrollArea, QDialog, QDialogButtonBox, QDoubleSpinBox
 )
 from PyQt6.QtCore import (
-    Qt, QThread, pyqtSignal, QTimer, QSettings, QSize, QMimeData, QUrl
+    Qt, QThread, pyqtSignal, QTimer, QSettings
 )
 from PyQt6.QtGui import (
-    QFont, QIcon, QPalette, QColor, QPixmap, QPainter, QDragEnterEvent,
-    QDropEvent, QAction
+    QFont, QDragEnterEvent, QDropEvent, QAction
 )
 
-from core import FileOrganizerCore, OrganizationResult, FileMatch
+from core import FileOrganizerCore, OrganizationResult
 from config import get_config_manager, CompanyProfile
 from normalize import generate_company_aliases
 from io_ops import UndoManager
 
 
+# Percorso del foglio di stile, calcolato una volta all'import
+_STYLE_PATH = Path(__file__).parent / "assets" / "style.qss"
+
+
+@lru_cache(maxsize=1)
+def _read_stylesheet() -> Optional[str]:
+    """
+    Legge il foglio di stile una sola volta per processo
+    (riusato dalle nuove finestre e dal cambio tema).
+    
+    Returns:
+        Contenuto del file QSS o None se non presente
+    """
+    try:
+        with open(_STYLE_PATH, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# Etichette delle soglie (0-100%) create una volta sola e riusate a ogni scatto dello slider
+_THRESHOLD_LABELS = tuple(f"{value}%" for value in range(101))
+
+
+def _split_alias_lines(text: str) -> List[str]:
+    """
+    Divide il testo degli alias (uno per riga) scartando spazi e righe vuote.
+    
+    Args:
+        text: Testo inserito dall'utente
+        
+    Returns:
+        Lista degli alias non vuoti, nell'ordine del testo
+    """
+    # Un solo strip per riga: il risultato serve sia al filtro che alla lista
+    return [alias for line in text.split('\n') if (alias := line.strip())]
+
+
 class WorkerThread(QThread):
     """Thread per operazioni asincrone."""
     
@@ -151,9 +186,7 @@ class CompanyProfileDialog(QDialog):
         self.threshold_slider.setRange(50, 100)
         self.threshold_slider.setValue(85)
         self.threshold_label = QLabel("85%")
-        self.threshold_slider.valueChanged.connect(
-            lambda v: self.threshold_label.setText(f"{v}%")
-        )
+        self.threshold_slider.valueChanged.connect(self._on_threshold_changed)
         threshold_layout.addWidget(self.threshold_slider)
         threshold_layout.addWidget(self.threshold_label)
         layout.addLayout(threshold_layout)
@@ -166,6 +199,10 @@ class CompanyProfileDialog(QDialog):
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
     
+    def _on_threshold_changed(self, value: int):
+        """Aggiorna l'etichetta della soglia."""
+        self.threshold_label.setText(_THRESHOLD_LABELS[value])
+    
     def generate_auto_aliases(self):
         """Genera alias automatici per l'azienda."""
         name = self.name_edit.text().strip()
@@ -174,12 +211,11 @@ class CompanyProfileDialog(QDialog):
             return
         
         aliases = generate_company_aliases(name)
-        current_aliases = self.aliases_edit.toPlainText().strip()
+        current_aliases = _split_alias_lines(self.aliases_edit.toPlainText())
         
         if current_aliases:
-            current_list = [a.strip() for a in current_aliases.split('\n') if a.strip()]
-            aliases.extend(current_list)
-            aliases = list(set(aliases))  # Rimuovi duplicati
+            aliases.extend(current_aliases)
+            aliases = list(dict.fromkeys(aliases))  # Rimuovi duplicati mantenendo l'ordine
         
         self.aliases_edit.setPlainText('\n'.join(aliases))
     
@@ -198,8 +234,7 @@ class CompanyProfileDialog(QDialog):
         if not name:
             return None
         
-        aliases_text = self.aliases_edit.toPlainText().strip()
-        aliases = [a.strip() for a in aliases_text.split('\n') if a.strip()]
+        aliases = _split_alias_lines(self.aliases_edit.toPlainText())
         
         return CompanyProfile(
             name=name,
@@ -212,7 +247,25 @@ class CompanyProfileDialog(QDialog):
 class DragDropWidget(QWidget):
     """Widget che supporta drag & drop di file e cartelle."""
     
-    files_dropped = pyqtSignal(list)  # Lista di percorsi
+    files_dropped = pyqtSignal(list)  # Lista di tuple (percorso, è_cartella)
+    
+    # Un unico foglio di stile: lo stato di hover è una proprietà dinamica,
+    # così il passaggio da uno stato all'altro non rianalizza il QSS
+    DROP_LABEL_STYLE = """
+        QLabel {
+            border: 2px dashed #aaa;
+            border-radius: 10px;
+            padding: 20px;
+            background-color: rgba(0, 0, 0, 0.05);
+            font-size: 14px;
+            color: #666;
+        }
+        QLabel[state="hover"] {
+            border: 2px dashed #4CAF50;
+            background-color: rgba(76, 175, 80, 0.1);
+            color: #4CAF50;
+        }
+    """
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -225,16 +278,8 @@ class DragDropWidget(QWidget):
         
         self.drop_label = QLabel("Trascina file o cartelle qui\no usa il pulsante Sfoglia")
         self.drop_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.drop_label.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #aaa;
-                border-radius: 10px;
-                padding: 20px;
-                background-color: rgba(0, 0, 0, 0.05);
-                font-size: 14px;
-                color: #666;
-            }
-        """)
+        self.drop_label.setProperty("state", "idle")
+        self.drop_label.setStyleSheet(self.DROP_LABEL_STYLE)
         layout.addWidget(self.drop_label)
         
         self.browse_btn = QPushButton("Sfoglia...")
@@ -245,56 +290,59 @@ class DragDropWidget(QWidget):
         """Gestisce l'ingresso del drag."""
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
-            self.drop_label.setStyleSheet("""
-                QLabel {
-                    border: 2px dashed #4CAF50;
-                    border-radius: 10px;
-                    padding: 20px;
-                    background-color: rgba(76, 175, 80, 0.1);
-                    font-size: 14px;
-                    color: #4CAF50;
-                }
-            """)
+            self._set_drop_state("hover")
     
     def dragLeaveEvent(self, event):
         """Gestisce l'uscita del drag."""
-        self.drop_label.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #aaa;
-                border-radius: 10px;
-                padding: 20px;
-                background-color: rgba(0, 0, 0, 0.05);
-                font-size: 14px;
-                color: #666;
-            }
-        """)
+        self._set_drop_state("idle")
+    
+    def _set_drop_state(self, state: str):
+        """Cambia lo stato dell'area di drop e riapplica lo stile già analizzato."""
+        # Qt può ripetere enter/leave attraversando i widget figli: nessun lavoro se invariato.
+        # La proprietà dinamica è l'unica copia dello stato (la stessa letta dal QSS)
+        if self.drop_label.property("state") == state:
+            return
+        self.drop_label.setProperty("state", state)
+        style = self.drop_label.style()
+        style.unpolish(self.drop_label)
+        style.polish(self.drop_label)
     
     def dropEvent(self, event: QDropEvent):
         """Gestisce il drop dei file."""
         self.dragLeaveEvent(event)
         
         urls = event.mimeData().urls()
-        paths = []
+        entries = []
         
         for url in urls:
             if url.isLocalFile():
                 path = url.toLocalFile()
-                if os.path.exists(path):
-                    paths.append(path)
+                # Un solo stat per percorso: esistenza e tipo insieme
+                try:
+                    mode = os.stat(path).st_mode
+                except OSError:
+                    continue
+                if stat.S_ISDIR(mode) or stat.S_ISREG(mode):
+                    entries.append((path, stat.S_ISDIR(mode)))
         
-        if paths:
-            self.files_dropped.emit(paths)
+        if entries:
+            self.files_dropped.emit(entries)
     
     def browse_folder(self):
         """Apre il dialog per selezionare una cartella."""
         folder = QFileDialog.getExistingDirectory(self, "Seleziona Cartella")
         if folder:
-            self.files_dropped.emit([folder])
+            self.files_dropped.emit([(folder, True)])
 
 
 class FileOrganizerGUI(QMainWindow):
     """Interfaccia grafica principale del File Organizer."""
     
+    # Fogli di stile dei controlli principali, condivisi come DROP_LABEL_STYLE
+    PREVIEW_BTN_STYLE = "QPushButton { font-weight: bold; padding: 10px; }"
+    ORGANIZE_BTN_STYLE = "QPushButton { font-weight: bold; padding: 10px; background-color: #4CAF50; }"
+    STATS_LABEL_STYLE = "QLabel { font-weight: bold; padding: 5px; }"
+    
     def __init__(self):
         super().__init__()
         self.config_manager = get_config_manager()
@@ -302,11 +350,19 @@ class FileOrganizerGUI(QMainWindow):
         self.current_worker = None
         self.current_undo_worker = None
         
+        # Ultimi valori scritti in QSettings (per saltare le scritture invariate)
+        self._last_saved_settings = {}
+        
         # Timer per salvare le impostazioni
         self.save_timer = QTimer()
         self.save_timer.timeout.connect(self.save_settings)
         self.save_timer.setSingleShot(True)
         
+        # Timer per caricare il profilo azienda solo a fine digitazione
+        self._company_change_timer = QTimer()
+        self._company_change_timer.timeout.connect(self._apply_company_change)
+        self._company_change_timer.setSingleShot(True)
+        
         self.setup_ui()
         self.load_settings()
         self.load_stylesheet()
@@ -527,12 +583,12 @@ class FileOrganizerGUI(QMainWindow):
         
         self.preview_btn = QPushButton("Anteprima")
         self.preview_btn.clicked.connect(self.preview_organization)
-        self.preview_btn.setStyleSheet("QPushButton { font-weight: bold; padding: 10px; }")
+        self.preview_btn.setStyleSheet(self.PREVIEW_BTN_STYLE)
         buttons_layout.addWidget(self.preview_btn)
         
         self.organize_btn = QPushButton("Organizza File")
         self.organize_btn.clicked.connect(self.organize_files)
-        self.organize_btn.setStyleSheet("QPushButton { font-weight: bold; padding: 10px; background-color: #4CAF50; }")
+        self.organize_btn.setStyleSheet(self.ORGANIZE_BTN_STYLE)
         buttons_layout.addWidget(self.organize_btn)
         
         self.undo_btn = QPushButton("Annulla Ultima Operazione")
@@ -583,7 +639,7 @@ class FileOrganizerGUI(QMainWindow):
         
         # Statistiche
         self.stats_label = QLabel("")
-        self.stats_label.setStyleSheet("QLabel { font-weight: bold; padding: 5px; }")
+        self.stats_label.setStyleSheet(self.STATS_LABEL_STYLE)
         progress_layout.addWidget(self.stats_label)
         
         layout.addLayout(progress_layout)
@@ -611,6 +667,8 @@ class FileOrganizerGUI(QMainWindow):
         
         self.results_table.setAlternatingRowColors(True)
         self.results_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        # Altezza di riga fissa: Qt non deve misurare ogni riga inserita
+        self.results_table.verticalHeader().setDefaultSectionSize(22)
         
         layout.addWidget(self.results_table)
         
@@ -671,51 +729,71 @@ class FileOrganizerGUI(QMainWindow):
         self.dry_run_check.setChecked(self.settings.value("dry_run", True, bool))
     
     def save_settings(self):
-        """Salva le impostazioni."""
-        self.settings.setValue("geometry", self.saveGeometry())
-        self.settings.setValue("last_root_path", self.root_path_edit.text())
-        self.settings.setValue("last_company", self.company_combo.currentText())
-        self.settings.setValue("threshold", self.threshold_slider.value())
-        self.settings.setValue("dry_run", self.dry_run_check.isChecked())
+        """Salva le impostazioni (solo quelle cambiate dall'ultimo salvataggio)."""
+        values = {
+            "geometry": self.saveGeometry(),
+            "last_root_path": self.root_path_edit.text(),
+            "last_company": self.company_combo.currentText(),
+            "threshold": self.threshold_slider.value(),
+            "dry_run": self.dry_run_check.isChecked(),
+        }
+        for key, value in values.items():
+            if self._last_saved_settings.get(key) != value:
+                self.settings.setValue(key, value)
+                self._last_saved_settings[key] = value
     
     def load_stylesheet(self):
         """Carica il foglio di stile."""
-        style_path = Path(__file__).parent / "assets" / "style.qss"
-        if style_path.exists():
-            with open(style_path, 'r', encoding='utf-8') as f:
-                self.setStyleSheet(f.read())
+        stylesheet = _read_stylesheet()
+        if stylesheet is not None:
+            self.setStyleSheet(stylesheet)
     
     def refresh_companies(self):
         """Aggiorna la lista delle aziende."""
         current_text = self.company_combo.currentText()
-        self.company_combo.clear()
         
         companies = self.config_manager.get_all_company_names()
-        self.company_combo.addItems(sorted(companies))
         
-        # Ripristina la selezione se possibile
-        if current_text:
-            index = self.company_combo.findText(current_text)
-            if index >= 0:
-                self.company_combo.setCurrentIndex(index)
-            else:
-                self.company_combo.setCurrentText(current_text)
+        # Ricostruzione senza segnali intermedi (clear/addItems emettono currentTextChanged)
+        self.company_combo.blockSignals(True)
+        try:
+            self.company_combo.clear()
+            self.company_combo.addItems(sorted(companies))
+            
+            # Ripristina la selezione se possibile
+            if current_text:
+                index = self.company_combo.findText(current_text)
+                if index >= 0:
+                    self.company_combo.setCurrentIndex(index)
+                else:
+                    self.company_combo.setCurrentText(current_text)
+        finally:
+            self.company_combo.blockSignals(False)
+        
+        # Un solo aggiornamento se alla fine il testo è cambiato
+        new_text = self.company_combo.currentText()
+        if new_text != current_text:
+            self.on_company_changed(new_text)
     
-    def handle_dropped_files(self, paths: List[str]):
-        """Gestisce i file trascinati."""
+    def handle_dropped_files(self, entries: List[Tuple[str, bool]]):
+        """
+        Gestisce i file trascinati.
+        
+        Args:
+            entries: Tuple (percorso, è_cartella) già verificate da DragDropWidget
+        """
         # Prendi il primo percorso valido
-        for path in paths:
-            if os.path.isdir(path):
+        for path, is_dir in entries:
+            if is_dir:
                 self.root_path_edit.setText(path)
                 self.log_message(f"Cartella selezionata: {path}")
                 break
         else:
             # Se non ci sono cartelle, prendi la directory del primo file
-            if paths:
-                first_file = Path(paths[0])
-                if first_file.is_file():
-                    self.root_path_edit.setText(str(first_file.parent))
-                    self.log_message(f"Cartella selezionata: {first_file.parent}")
+            if entries:
+                parent = os.path.dirname(entries[0][0])
+                self.root_path_edit.setText(parent)
+                self.log_message(f"Cartella selezionata: {parent}")
     
     def browse_root_folder(self):
         """Apre il dialog per selezionare la cartella sorgente."""
@@ -735,18 +813,23 @@ class FileOrganizerGUI(QMainWindow):
     
     def update_threshold_label(self, value: int):
         """Aggiorna l'etichetta della soglia."""
-        self.threshold_label.setText(f"{value}%")
+        self.threshold_label.setText(_THRESHOLD_LABELS[value])
         # Avvia il timer per salvare le impostazioni
         self.save_timer.start(1000)
     
     def on_company_changed(self, company_name: str):
-        """Gestisce il cambio di azienda."""
+        """Gestisce il cambio di azienda (raggruppando i tasti digitati in sequenza)."""
+        self._company_change_timer.start(150)
+    
+    def _apply_company_change(self):
+        """Carica il profilo dell'azienda selezionata, se esiste."""
+        company_name = self.company_combo.currentText()
         if not company_name:
             return
         
-        # Carica il profilo se esiste
-        if company_name in self.config_manager.get_all_company_names():
-            profile = self.config_manager.get_company_profile(company_name)
+        # Carica il profilo se esiste (una sola lettura dal dizionario dei profili)
+        profile = self.config_manager.get_company_profile(company_name)
+        if profile is not None:
             self.aliases_edit.setText(', '.join(profile.aliases))
             self.threshold_slider.setValue(int(self.config_manager.settings.default_threshold))
     
@@ -773,9 +856,7 @@ class FileOrganizerGUI(QMainWindow):
             QMessageBox.warning(self, "Attenzione", "Seleziona un'azienda da modificare.")
             return
         
-        profile = None
-        if company_name in self.config_manager.get_all_company_names():
-            profile = self.config_manager.get_company_profile(company_name)
+        profile = self.config_manager.get_company_profile(company_name)
         
         dialog = CompanyProfileDialog(self, profile)
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -839,6 +920,9 @@ class FileOrganizerGUI(QMainWindow):
             dry_run=self.dry_run_check.isChecked()
         )
         
+        # Thread di analisi dimensionati sui core, lasciandone uno all'interfaccia
+        organizer.max_workers = max(2, QThread.idealThreadCount() - 1)
+        
         # Configura i filtri
         include_ext = None
         exclude_ext = None
@@ -972,16 +1056,19 @@ class FileOrganizerGUI(QMainWindow):
     
     def update_progress(self, phase: str, current: int, total: int):
         """Aggiorna la barra di progresso."""
-        self.progress_label.setText(f"{phase} [{current}/{total}]")
-        
         if total > 0:
+            self.progress_label.setText(f"{phase} [{current}/{total}]")
+            # Torna alla barra percentuale dopo la fase a totale sconosciuto
+            if self.progress_bar.maximum() == 0:
+                self.progress_bar.setRange(0, 100)
             percentage = int((current / total) * 100)
             self.progress_bar.setValue(percentage)
-        
-        # Aggiorna anche la barra di stato
-        if total > 0:
             self.statusBar().showMessage(f"{phase} - {percentage}% completato")
         else:
+            # Totale sconosciuto (scansione): solo il conteggio e barra indeterminata
+            self.progress_label.setText(f"{phase} [{current}]")
+            if self.progress_bar.maximum() != 0:
+                self.progress_bar.setRange(0, 0)
             self.statusBar().showMessage(f"{phase} - {current} elementi")
     
     def handle_organization_result(self, result: OrganizationResult):
@@ -1051,6 +1138,7 @@ class FileOrganizerGUI(QMainWindow):
         # Mostra/nasconde la barra di progresso
         self.progress_bar.setVisible(running)
         if running:
+            self.progress_bar.setRange(0, 100)
             self.progress_bar.setValue(0)
         
         if not running:
@@ -1063,32 +1151,37 @@ class FileOrganizerGUI(QMainWindow):
     
     def display_results(self, result: OrganizationResult):
         """Mostra i risultati nella tabella."""
-        self.results_table.setRowCount(len(result.matches))
-        
-        for row, match in enumerate(result.matches):
-            # Origine (percorso completo: "cartella file trovato"\filetrovato.*)
-            file_path = Path(match.file_path)
-            origin_path = f"{file_path.parent}\\{file_path.name}"
-            self.results_table.setItem(row, 0, QTableWidgetItem(origin_path))
-            
-            # Corrispondenza %
-            score_item = QTableWidgetItem(f"{match.match_score:.1f}%")
-            score_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.results_table.setItem(row, 1, score_item)
-            
-            # Tipo di file
-            file_type = file_path.suffix.upper() if file_path.suffix else "N/A"
-            if file_type.startswith('.'):
-                file_type = file_type[1:]  # Rimuove il punto iniziale
-            type_item = QTableWidgetItem(file_type)
-            type_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.results_table.setItem(row, 2, type_item)
-            
-            # Data file
-            date_str = match.file_date.strftime("%Y-%m-%d") if match.file_date else "N/A"
-            date_item = QTableWidgetItem(date_str)
-            date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.results_table.setItem(row, 3, date_item)
+        table = self.results_table
+        # Riempimento in blocco: righe allocate una volta e un solo ridisegno alla fine
+        table.setUpdatesEnabled(False)
+        try:
+            table.setRowCount(len(result.matches))
+            for row, match in enumerate(result.matches):
+                # Origine (percorso completo: "cartella file trovato"\filetrovato.*)
+                file_path = Path(match.file_path)
+                origin_path = f"{file_path.parent}\\{file_path.name}"
+                table.setItem(row, 0, QTableWidgetItem(origin_path))
+                
+                # Corrispondenza %
+                score_item = QTableWidgetItem(f"{match.match_score:.1f}%")
+                score_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, 1, score_item)
+                
+                # Tipo di file
+                file_type = file_path.suffix.upper() if file_path.suffix else "N/A"
+                if file_type.startswith('.'):
+                    file_type = file_type[1:]  # Rimuove il punto iniziale
+                type_item = QTableWidgetItem(file_type)
+                type_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, 2, type_item)
+                
+                # Data file
+                date_str = match.file_date.strftime("%Y-%m-%d") if match.file_date else "N/A"
+                date_item = QTableWidgetItem(date_str)
+                date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, 3, date_item)
+        finally:
+            table.setUpdatesEnabled(True)
     
     def undo_last_operation(self):
         """Annulla l'ultima operazione."""
@@ -1253,8 +1346,9 @@ class FileOrganizerGUI(QMainWindow):
                 event.ignore()
                 return
         
-        # Salva le impostazioni
+        # Salva le impostazioni e scrivile su disco una volta sola, all'uscita
         self.save_settings()
+        self.settings.sync()
         event.accept()
 
 
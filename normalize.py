@@ -5,7 +5,7 @@ Gestisce la normalizzazione di nomi aziendali per il matching fuzzy.
 
 import re
 import unicodedata
-from typing import List, Set
+from typing import Dict, List, Set
 
 
 class CompanyNameNormalizer:
@@ -82,9 +82,13 @@ class CompanyNameNormalizer:
         'configurazione', 'setting', 'impostazione', 'option', 'opzione'
     }
     
+    # Numero massimo di testi normalizzati tenuti in cache
+    CACHE_SIZE = 8192
+    
     def __init__(self):
         """Inizializza il normalizzatore."""
         self._compile_patterns()
+        self._cache: Dict[str, str] = {}
     
     def _compile_patterns(self):
         """Compila i pattern regex per l'ottimizzazione."""
@@ -113,6 +117,19 @@ class CompanyNameNormalizer:
         Returns:
             Testo normalizzato
         """
+        # Gli stessi frammenti di nome file vengono normalizzati molte volte
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+        
+        normalized = self._normalize_uncached(text)
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[text] = normalized
+        return normalized
+    
+    def _normalize_uncached(self, text: str) -> str:
+        """Esegue la normalizzazione vera e propria (vedi normalize)."""
         if not text:
             return ""
         
@@ -13,9 +13,11 @@ import csv
 
 from normalize import CompanyNameNormalizer
 from file_types import FileTypeMapper, FileCategory
-from core import CompanyMatcher, DateExtractor, FileOrganizerCore
+from core import CompanyMatcher, DateExtractor, FileOrganizerCore, FileScanner
 from io_ops import FileOrganizer, UndoManager
 from config import ConfigManager, CompanyProfile
+from company_config import CompanyConfig
+from yaml_io import load_yaml, invalidate_yaml_cache, write_atomic
 
 
 class TestCompanyNameNormalizer:
@@ -62,11 +64,54 @@ class TestFileTypeMapper:
         assert self.mapper.get_file_category("image.jpg") == FileCategory.IMMAGINI
         assert self.mapper.get_file_category("unknown.xyz") == FileCategory.ALTRO
     
+    def test_classify_many(self):
+        """Test classificazione di più file in un'unica chiamata"""
+        filenames = ["a.pdf", "B.PDF", "c.tar.gz", "d", "e.xyz"]
+        assert self.mapper.classify_many(filenames) == [
+            self.mapper.get_file_category(filename) for filename in filenames
+        ]
+    
+    def test_known_names_without_extension(self):
+        """Test nomi file noti senza estensione"""
+        assert self.mapper.get_file_category("Makefile") == FileCategory.CODICE
+        assert self.mapper.get_file_category("Dockerfile") == FileCategory.CODICE
+        assert self.mapper.get_file_category("NOTE") == FileCategory.ALTRO
+        assert self.mapper.get_file_category("README") == FileCategory.ALTRO
+    
+    def test_category_mask(self):
+        """Test appartenenza a un gruppo di categorie"""
+        documents = self.mapper.category_mask(FileCategory.PDF, FileCategory.WORD)
+        assert self.mapper.is_any("offerta.pdf", documents)
+        assert self.mapper.is_any("offerta.DOCX", documents)
+        assert not self.mapper.is_any("foto.jpg", documents)
+    
     def test_composite_extensions(self):
         """Test estensioni composite"""
         assert self.mapper.get_file_category("file.tar.gz") == FileCategory.ARCHIVI
         assert self.mapper.get_file_category("backup.sql.gz") == FileCategory.ARCHIVI
     
+    def test_composite_extension_longest_suffix(self):
+        """Test estensione composta prioritaria sulla semplice, anche in maiuscolo"""
+        self.mapper.add_extension_mapping(".tar.gz", FileCategory.CODICE)
+        assert self.mapper.get_file_category("BACKUP.TAR.GZ") == FileCategory.CODICE
+        assert self.mapper.get_file_category("backup.sql.gz") == FileCategory.ARCHIVI
+        assert self.mapper.get_file_category("backup.tar.gz") == FileCategory.CODICE
+    
+    def test_custom_composite_extension(self):
+        """Test estensione composta aggiunta dall'utente"""
+        assert self.mapper.get_file_category("backup.tar.zst") == FileCategory.ALTRO
+        self.mapper.add_extension_mapping(".tar.zst", FileCategory.ARCHIVI)
+        assert self.mapper.get_file_category("backup.TAR.ZST") == FileCategory.ARCHIVI
+        assert self.mapper.get_file_category("backup.zst") == FileCategory.ALTRO
+    
+    def test_category_cache_updated_on_mapping_change(self):
+        """Test cache delle categorie aggiornata quando cambiano le mappature"""
+        assert self.mapper.get_file_category("data.xyz") == FileCategory.ALTRO
+        self.mapper.add_extension_mapping("xyz", FileCategory.CODICE)
+        assert self.mapper.get_file_category("data.XYZ") == FileCategory.CODICE
+        self.mapper.remove_extension_mapping(".xyz")
+        assert self.mapper.get_file_category("data.xyz") == FileCategory.ALTRO
+    
     def test_filter_files_by_extensions(self):
         """Test filtro per estensioni"""
         files = ["doc.pdf", "sheet.xlsx", "image.jpg", "unknown.xyz"]
@@ -104,6 +149,45 @@ class TestCompanyMatcher:
         """Test nessun match"""
         company, score, matched_text = self.matcher.find_best_match("unknown company")
         assert company is None or score < 90
+    
+    def test_find_best_company_for_file(self):
+        """Test miglior match di un file uguale al primo di extract_company_names_from_path"""
+        for path in ("/docs/acme/fattura_beta_2024.pdf", "/docs/acme corp/report.pdf", "/docs/varie/nota.pdf"):
+            matches = self.matcher.extract_company_names_from_path(path)
+            expected = matches[0] if matches else None
+            assert self.matcher.find_best_company_for_file(path) == expected
+
+    
+    def test_trigram_prefilter_same_result(self):
+        """Test prefiltro a trigrammi con lo stesso risultato della scansione completa"""
+        full_scan = CompanyMatcher()
+        full_scan.PREFILTER_MIN_THRESHOLD = 101.0
+        full_scan.add_company("ACME Corporation", ["acme", "acme corp"])
+        full_scan.add_company("Beta Solutions", ["beta", "beta sol"])
+        
+        for text in ("acme corporation", "fattura acme 2024", "beta sol", "bta solutions", "xy"):
+            assert self.matcher.find_best_match(text) == full_scan.find_best_match(text)
+    
+    def test_match_cache_cleared_on_add_company(self):
+        """Test cache dei match svuotata quando cambiano le aziende"""
+        assert self.matcher.find_best_match("gamma srl")[0] != "Gamma Srl"
+        self.matcher.add_company("Gamma Srl", ["gamma"])
+        assert self.matcher.find_best_match("gamma srl")[0] == "Gamma Srl"
+    
+    def test_build_index_after_redefinition(self):
+        """Test indice ricostruito subito dopo la ridefinizione di un'azienda"""
+        self.matcher.add_company("ACME Corporation", ["acme", "acme group"])
+        self.matcher.build_index()
+        assert self.matcher.find_best_match("acme group")[0] == "ACME Corporation"
+    
+    def test_match_all_company_rules(self):
+        """Test validazione di un match per tutte le aziende configurate"""
+        config = self.matcher.config
+        config.add_company("Rules Test Srl", ["rules test"],
+                           required_keywords=["rules"], excluded_standalone=["test"])
+        valid = config.match_all("rules test", "Report Rules Test 2024")
+        assert "Rules Test Srl" in valid
+        assert "Rules Test Srl" not in config.match_all("test", "test only")
 
 
 class TestDateExtractor:
@@ -132,6 +216,12 @@ class TestDateExtractor:
         result = self.extractor.extract_date_from_file_stats(str(test_file))
         assert result is None or isinstance(result, date)
     
+    def test_invalid_day_uses_next_pattern(self):
+        """Test data impossibile scartata a favore del pattern successivo"""
+        result = self.extractor.extract_date_from_filename("report_2023-02-30_15-03-2023.pdf")
+        assert result == date(2023, 3, 15)
+        assert self.extractor.extract_date_from_filename("report_31-04-2023.pdf") is None
+    
     def test_various_formats(self):
         """Test vari formati di data"""
         test_cases = [
@@ -281,6 +371,84 @@ class TestConfigManager:
         assert len(self.config_manager.companies) == initial_count + 1
         assert unique_name in self.config_manager.companies
     
+    def test_save_settings_only_changes(self):
+        """Test salvataggio delle sole impostazioni diverse dai default"""
+        manager = ConfigManager(str(Path(self.temp_dir) / "cfg"))
+        manager.settings.theme = "light"
+        manager.settings.default_exclude_folders.append("build")
+        manager.save_settings()
+        
+        saved = load_yaml(manager.settings_file)
+        assert set(saved) == {"theme", "default_exclude_folders"}
+        
+        reloaded = ConfigManager(str(manager.config_dir)).settings
+        assert reloaded.theme == "light"
+        assert "build" in reloaded.default_exclude_folders
+        assert reloaded.window_width == 1200
+    
+    def test_get_all_profiles(self):
+        """Test recupero di tutti i profili in un'unica chiamata"""
+        unique_name = f"Profile Company {datetime.now().microsecond}"
+        self.config_manager.add_company_profile(unique_name, ["profile"])
+        
+        profiles = self.config_manager.get_all_profiles()
+        assert profiles[unique_name].aliases == ["profile"]
+        assert set(profiles) == set(self.config_manager.get_all_company_names())
+    
+    def test_debounced_save(self):
+        """Test salvataggio differito delle modifiche ai profili"""
+        manager = ConfigManager(str(Path(self.temp_dir) / "cfg"))
+        manager.add_company_profile("Company A", ["comp_a"])
+        manager.add_company_profile("Company B", ["comp_b"])
+        assert not manager.companies_file.exists()
+        
+        manager.flush()
+        assert set(ConfigManager(str(manager.config_dir)).companies) == {"Company A", "Company B"}
+    
+    def test_failed_save_stays_pending(self):
+        """Test sezione rimessa in attesa se la scrittura fallisce"""
+        manager = ConfigManager(str(Path(self.temp_dir) / "cfg"))
+        manager.add_company_profile("Company A", ["comp_a"])
+        manager.companies_file.mkdir()
+        manager.flush()
+        assert "companies" in manager._dirty
+        
+        manager.companies_file.rmdir()
+        manager.flush()
+        assert not manager._dirty
+        assert set(ConfigManager(str(manager.config_dir)).companies) == {"Company A"}
+    
+    def test_add_recent_file(self):
+        """Test lista file recenti: spostamento in testa e limite massimo"""
+        manager = ConfigManager(str(Path(self.temp_dir) / "cfg"))
+        for i in range(ConfigManager.MAX_RECENT_FILES + 2):
+            manager.add_recent_file(f"file_{i}")
+        manager.add_recent_file("file_5")
+        
+        recent = manager.get_recent_files()
+        assert recent[:2] == ["file_5", "file_11"]
+        assert len(recent) == ConfigManager.MAX_RECENT_FILES
+        assert "file_0" not in recent and "file_1" not in recent
+        manager.add_recent_file("file_0")
+        assert manager.get_recent_files()[0] == "file_0"
+        assert len(manager.get_recent_files()) == ConfigManager.MAX_RECENT_FILES
+        manager.flush()
+    
+    def test_recent_files_migrated_from_yaml(self):
+        """Test migrazione di recent.yaml al formato JSON"""
+        config_dir = Path(self.temp_dir) / "cfg"
+        config_dir.mkdir()
+        existing = Path(self.temp_dir) / "existing.txt"
+        existing.write_text("test")
+        (config_dir / "recent.yaml").write_text(
+            f"- {existing}\n- {Path(self.temp_dir) / 'missing.txt'}\n", encoding='utf-8'
+        )
+        
+        manager = ConfigManager(str(config_dir))
+        assert manager.get_recent_files() == [str(existing)]
+        assert not (config_dir / "recent.yaml").exists()
+        assert ConfigManager(str(config_dir)).get_recent_files() == [str(existing)]
+    
     def test_export_import_companies(self):
         """Test export/import aziende"""
         # Aggiungi profili
@@ -298,6 +466,144 @@ class TestConfigManager:
         assert len(new_manager.companies) >= 2
 
 
+class TestYamlCache:
+    """Test per la cache dei file YAML"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.yaml_file = Path(self.temp_dir) / "data.yaml"
+        self.yaml_file.write_text("items: [a, b]\n", encoding='utf-8')
+    
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_returned_data_is_a_copy(self):
+        """Test che le modifiche del chiamante non alterino la cache"""
+        data = load_yaml(self.yaml_file)
+        data['items'].append('c')
+        assert load_yaml(self.yaml_file) == {'items': ['a', 'b']}
+    
+    def test_reload_after_change(self):
+        """Test rilettura dopo modifica del file"""
+        assert load_yaml(self.yaml_file) == {'items': ['a', 'b']}
+        self.yaml_file.write_text("items: [x]\n", encoding='utf-8')
+        invalidate_yaml_cache()
+        assert load_yaml(self.yaml_file) == {'items': ['x']}
+
+    
+    def test_write_atomic_skips_unchanged(self):
+        """Test scrittura atomica saltata se il contenuto non cambia"""
+        target = Path(self.temp_dir) / "out.yaml"
+        assert write_atomic(target, b"a: 1\n")
+        assert not write_atomic(target, b"a: 1\n")
+        assert write_atomic(target, b"a: 2\n")
+        assert target.read_bytes() == b"a: 2\n"
+        assert list(Path(self.temp_dir).glob("*.tmp")) == []
+    
+    def test_concurrent_writes_same_file(self):
+        """Test scritture concorrenti dello stesso file: il risultato è sempre completo"""
+        import threading
+        target = Path(self.temp_dir) / "out.yaml"
+        contents = [f"items: {list(range(i, i + 500))}\n".encode() for i in range(4)]
+        
+        errors = []
+        
+        def writer(content):
+            try:
+                for _ in range(50):
+                    write_atomic(target, content)
+                    write_atomic(target, b"x: 0\n")
+            except OSError as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(c,)) for c in contents]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert target.read_bytes() in contents + [b"x: 0\n"]
+        assert list(Path(self.temp_dir).glob("*.tmp")) == []
+
+
+class TestCompanyConfig:
+    """Test per le regole di validazione delle aziende"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # File inesistente: viene usata la configurazione predefinita
+        self.config = CompanyConfig(str(Path(self.temp_dir) / "companies.yaml"))
+    
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_added_company_rules_applied(self):
+        """Test parole chiave di un'azienda aggiunta dopo il primo utilizzo"""
+        assert self.config.is_valid_match("Area Finanza Spa", "Area Finanza", "area finanza 2023")
+        self.config.add_company("Beta Srl", aliases=["Beta"], required_keywords=["beta", "srl"])
+        
+        assert self.config.is_valid_match("Beta Srl", "Beta", "fattura beta srl")
+        assert not self.config.is_valid_match("Beta Srl", "Beta", "fattura beta")
+    
+    def test_keyword_hits_consistent_across_threads(self):
+        """Test verifica delle parole chiave da più thread con testi diversi"""
+        from concurrent.futures import ThreadPoolExecutor
+        texts = ["area finanza report", "area report"] * 500
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda text: self.config.is_valid_match("Area Finanza Spa", "Area Finanza", text), texts
+            ))
+        
+        assert results == [("finanza" in text) for text in texts]
+
+
+class TestFileScanner:
+    """Test per la scansione delle directory"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for relative in ("docs/acme.pdf", "node_modules/pkg/index.js", "docs/.git/config.txt"):
+            file_path = Path(self.temp_dir) / relative
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text("test content")
+    
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_excluded_folders_not_visited(self, monkeypatch):
+        """Test cartelle escluse potate prima di entrarci"""
+        import core
+        visited = []
+        original_scandir = os.scandir
+        
+        def recording_scandir(path):
+            visited.append(Path(path).name)
+            return original_scandir(path)
+        
+        monkeypatch.setattr(core.os, "scandir", recording_scandir)
+        scanner = FileScanner(exclude_folders={"node_modules", ".git"})
+        files = scanner.scan_directory(self.temp_dir)
+        
+        assert [Path(f).name for f in files] == ["acme.pdf"]
+        assert "node_modules" not in visited and ".git" not in visited
+    
+    def test_files_grouped_by_folder(self):
+        """Test file di una stessa cartella restituiti consecutivi"""
+        for relative in ("docs/beta.pdf", "docs/sub/gamma.pdf", "other/delta.pdf"):
+            file_path = Path(self.temp_dir) / relative
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text("test content")
+        
+        folders = [os.path.dirname(f) for f in FileScanner().scan_directory(self.temp_dir)]
+        seen = []
+        for folder in folders:
+            if not seen or seen[-1] != folder:
+                assert folder not in seen
+                seen.append(folder)
+
+
 class TestFileOrganizerCore:
     """Test per il core dell'organizzatore"""
     
@@ -333,6 +639,21 @@ class TestFileOrganizerCore:
         assert result.total_files >= 3
         assert result.processed_files >= 0  # Alcuni file potrebbero essere processati
         assert isinstance(result.matches, list)
+    
+    def test_scan_entries_reused_for_size(self):
+        """Test dimensione dei file presa dalle DirEntry della scansione"""
+        entries = self.organizer.scanner.scan_directory_entries(self.temp_dir)
+        assert sorted(entry.name for entry in entries) == sorted(
+            Path(p).name for p in self.organizer.scanner.scan_directory(self.temp_dir)
+        )
+        
+        self.organizer.dry_run = True
+        result = self.organizer.organize_files(
+            root_path=self.temp_dir,
+            output_path=str(Path(self.temp_dir) / "organized")
+        )
+        assert result.matches
+        assert all(match.file_size == len("test content") for match in result.matches)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+"""
+Modulo per la lettura e scrittura dei file di configurazione.
+Memorizza i dati già letti, usando come chiave percorso e data di modifica del file,
+e scrive i file in modo atomico.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import yaml
+
+# Loader in C di libyaml se disponibile, altrimenti quello in puro Python
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@lru_cache(maxsize=32)
+def _load_yaml(path: str, mtime_ns: int) -> Any:
+    """
+    Legge e analizza un file YAML (risultato in cache per percorso e mtime).
+
+    Args:
+        path: Percorso del file
+        mtime_ns: Data di modifica del file in nanosecondi (chiave di cache)
+
+    Returns:
+        Dati contenuti nel file
+    """
+    # Lettura in un'unica chiamata: la decodifica UTF-8 la fa il loader (in C con libyaml)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return yaml.load(raw, Loader=_SafeLoader)
+
+
+def load_yaml(path) -> Any:
+    """
+    Carica un file YAML, riutilizzando l'analisi precedente se il file non è cambiato.
+
+    Args:
+        path: Percorso del file
+
+    Returns:
+        Copia dei dati contenuti nel file (modificabile dal chiamante)
+    """
+    path = os.fspath(path)
+    data = _load_yaml(path, os.stat(path).st_mtime_ns)
+    return copy.deepcopy(data)
+
+
+def invalidate_yaml_cache():
+    """Svuota la cache dei file YAML (da chiamare dopo ogni salvataggio)."""
+    _load_yaml.cache_clear()
+
+
+# Impronta dell'ultimo contenuto scritto per ogni file: (hash, mtime_ns)
+_written_hashes: Dict[str, Tuple[bytes, int]] = {}
+
+
+def write_atomic(path, content: bytes) -> bool:
+    """
+    Scrive un file in modo atomico (file temporaneo + os.replace).
+    La scrittura viene saltata se il contenuto è identico all'ultimo scritto
+    e il file non è stato modificato nel frattempo.
+
+    Args:
+        path: Percorso del file
+        content: Contenuto da scrivere
+
+    Returns:
+        True se il file è stato scritto, False se era già aggiornato
+    """
+    path = os.fspath(path)
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+
+    previous = _written_hashes.get(path)
+    if previous is not None and previous[0] == digest:
+        try:
+            if os.stat(path).st_mtime_ns == previous[1]:
+                return False
+        except OSError:
+            pass
+
+    with open_atomic(path, 'wb') as f:
+        f.write(content)
+
+    _written_hashes[path] = (digest, os.stat(path).st_mtime_ns)
+    return True
+
+
+@contextmanager
+def open_atomic(path, mode: str = 'w'):
+    """
+    Apre un file temporaneo che sostituisce `path` solo alla chiusura senza errori.
+
+    Args:
+        path: Percorso del file finale
+        mode: Modalità di apertura ('w' testo UTF-8 o 'wb' binaria)
+
+    Returns:
+        Context manager che restituisce il file aperto in scrittura
+    """
+    path = os.fspath(path)
+    # Nome temporaneo diverso per processo e thread: salvataggi concorrenti dello
+    # stesso file (timer dei salvataggi differiti e thread principale) non si
+    # sovrascrivono il file temporaneo, vince l'ultimo os.replace
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    encoding = None if 'b' in mode else 'utf-8'
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def dump_yaml(path, data: Any, **kwargs) -> bool:
+    """
+    Serializza dati in YAML e li scrive in modo atomico.
+
+    Args:
+        path: Percorso del file
+        data: Dati da salvare
+        **kwargs: Opzioni passate a yaml.dump
+
+    Returns:
+        True se il file è stato scritto, False se era già aggiornato
+    """
+    text = yaml.dump(data, allow_unicode=True, default_flow_style=False, **kwargs)
+    return write_atomic(path, text.encode('utf-8'))